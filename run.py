@@ -1,15 +1,97 @@
+import hashlib
+import os
+import re
 import sys
+import time
 
-# https://stackoverflow.com/a/51704613
-try:
-    from pip import main as pipmain
-except ImportError:
-    from pip._internal import main as pipmain
+START_TIME = time.perf_counter()
 
 DEFAULT_LOGGER = 'rlbot'
+REQUIREMENTS_FILE = 'requirements.txt'
+# Records the requirements that were last installed successfully, so unchanged setups can skip pip entirely
+FINGERPRINT_FILE = '.requirements.fingerprint'
+# Fast start skips the upgrade check while requirements.txt is unchanged. It is meant for offline tournament
+# machines, so it is off unless run.py is given --fast or this environment variable is set to 1
+FAST_START_VARIABLE = 'RLBOT_FAST_START'
+
+
+def pipmain(args):
+    # pip is slow to import, so only load it when something actually needs installing
+    # https://stackoverflow.com/a/51704613
+    try:
+        from pip import main as pip_entry
+    except ImportError:
+        from pip._internal import main as pip_entry
+    return pip_entry(args)
+
+
+def install_requirements():
+    status = pipmain(['install', '-r', REQUIREMENTS_FILE, '--upgrade', '--upgrade-strategy=eager'])
+    if not status:
+        save_fingerprint()
+
+
+def requirements_fingerprint():
+    with open(REQUIREMENTS_FILE, 'rb') as requirements:
+        digest = hashlib.sha256(requirements.read())
+    digest.update(sys.version.encode())
+    return digest.hexdigest()
+
+
+def fingerprint_matches():
+    try:
+        with open(FINGERPRINT_FILE) as fingerprint:
+            return fingerprint.read().strip() == requirements_fingerprint()
+    except OSError:
+        return False
+
+
+def save_fingerprint():
+    with open(FINGERPRINT_FILE, 'w') as fingerprint:
+        fingerprint.write(requirements_fingerprint())
 
-if __name__ == '__main__':
 
+def requirements_satisfied():
+    # Lets machines that were set up without this script, or that can't reach pip, use the fingerprint too
+    from importlib import metadata
+    try:
+        from packaging.specifiers import SpecifierSet
+    except ImportError:
+        # Without packaging the versions can't be checked, so only requirements without one can be trusted
+        SpecifierSet = None
+
+    with open(REQUIREMENTS_FILE) as requirements:
+        lines = [line.split('#')[0].strip() for line in requirements]
+    for line in lines:
+        if not line:
+            continue
+        match = re.match(r'([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*([^;]*)', line)
+        if match is None or line.startswith('-') or '://' in line or '@' in line:
+            # Options, paths and URLs can't be checked without pip
+            return False
+        name, _, specifier = match.groups()
+        try:
+            version = metadata.version(name)
+            if specifier.strip() and (SpecifierSet is None or version not in SpecifierSet(specifier.strip())):
+                return False
+        except (metadata.PackageNotFoundError, ValueError):
+            return False
+    return True
+
+
+def save_fingerprint_if_satisfied():
+    # pip can't run here, but if everything is already installed fast start can still skip this check next time
+    if requirements_satisfied():
+        save_fingerprint()
+
+
+def report_startup(checked):
+    imported = time.perf_counter()
+    print(f'Startup took {imported - START_TIME:.2f}s '
+          f'(requirements {checked - START_TIME:.2f}s, imports {imported - checked:.2f}s)')
+
+
+def check_requirements():
     try:
         from rlbot.utils import public_utils, logging_utils
 
@@ -17,8 +99,11 @@ if __name__ == '__main__':
         if not public_utils.have_internet():
             logger.log(logging_utils.logging_level,
                        'Skipping upgrade check for now since it looks like you have no internet')
-        elif public_utils.is_safe_to_upgrade():
-            pipmain(['install', '-r', 'requirements.txt', '--upgrade', '--upgrade-strategy=eager'])
+            save_fingerprint_if_satisfied()
+        elif not public_utils.is_safe_to_upgrade():
+            save_fingerprint_if_satisfied()
+        else:
+            install_requirements()
 
             # https://stackoverflow.com/a/44401013
             rlbots = [module for module in sys.modules if module.startswith('rlbot')]
@@ -26,15 +111,31 @@ if __name__ == '__main__':
                 sys.modules.pop(rlbot_module)
 
     except ImportError:
-        pipmain(['install', '-r', 'requirements.txt', '--upgrade', '--upgrade-strategy=eager'])
+        install_requirements()
+
+
+if __name__ == '__main__':
+
+    # Pass --fast to skip the upgrade check while requirements.txt is unchanged since the last install
+    fast_start = os.environ.get(FAST_START_VARIABLE) == '1'
+    if '--fast' in sys.argv:
+        sys.argv.remove('--fast')
+        fast_start = True
+    if fast_start and fingerprint_matches():
+        print('Requirements unchanged since the last install, skipping the upgrade check')
+    else:
+        check_requirements()
+    checked = time.perf_counter()
 
     try:
         if len(sys.argv) > 1 and sys.argv[1] == 'gui':
             from rlbot.gui.qt_root import RLBotQTGui
+            report_startup(checked)
 
             RLBotQTGui.main()
         else:
             from rlbot import runner
+            report_startup(checked)
 
             runner.main()
     except Exception as e:
@@ -1,12 +1,24 @@
 import math
 import time
 
-from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
+from rlbot.agents.base_agent import BaseAgent, SimpleControllerState, BOT_CONFIG_AGENT_HEADER
+from rlbot.parsing.custom_config import ConfigObject
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 
 from util.orientation import Orientation, relative_location
 from util.vec import Vec3
-from util.util import predict_ball_path, sign
+from util.util import sign
+from util.cache import SHARED_CACHE
+from util.prediction import ingest_prediction
+from util.boost import BoostPadTracker
+from util.aerial import aerial_reachability
+from maneuvers import ManeuverScheduler
+from kickoff import Kickoff, load_kickoffs, spawn_slot
+from telemetry import TelemetryPublisher, pack_frame
+from profiling import AllocationCounter, TickProfiler
+from matchlog import MatchLogWriter, new_match_directory
+from planner import AnytimePlanner, reactive_choice
+from worker import PlanningWorker, Snapshot
 
 from states import *
 
@@ -36,12 +48,14 @@ class Car(GameObject):
     
     Attributes:
         boost (float): The amount of boost remaining in the car
+        on_ground (bool): Whether the car's wheels are touching a surface
     
     """
     def __init__(self):
         """Creates a new Car object with zero boost."""
         super().__init__()
         self.boost = 0.0
+        self.on_ground = True
     
 
 class Ball(GameObject):
@@ -58,31 +72,142 @@ class MyBot(BaseAgent):
     This is the class used by the rlBot framework to run the bot in-game.
     
     Attributes:
-        controller_state (SimpleControllerState): The current set of commands the bot's controller should recieve
+        controller_state (SimpleControllerState): The current set of commands the bot's controller should recieve.
+            The controllers reuse this object every tick instead of creating a new one
+        aim_scratch (Vec3): Reusable vector the controllers write field locations into
+        local_scratch (Vec3): Reusable vector the controllers write car-relative locations into
+        aim_target (Vec3): The location the current state or maneuver aimed for on the last tick it ran, kept so
+            telemetry can publish it without working it out again
         me (Car): The Car GameObject representing the bot
         ball (Ball): The Ball object representing the ball
+        opponents (list): Car objects for every car on the other team
+        boost_pads (BoostPadTracker): Locations and respawn times of the boost pads
+        aerial (AerialResult): Which predicted ball slices the bot can reach in the air
         state (State): The state governing the bot's current behavior
         controller (Controller): The controller governing the bot's movement
+        maneuvers (ManeuverScheduler): Runs multi-tick maneuvers, which take priority over the state
+        kickoffs (dict): Precomputed kickoff inputs for each spawn slot, loaded from kickoffs.bin
+        game_time (float): Seconds of game time elapsed, taken from the latest GameTickPacket
+        frame_num (int): Physics frame number, taken from the latest GameTickPacket
+        ball_prediction (tuple): Arrays of the predicted ball slice times and locations, see PredictionBuffer
+        goal_threats (tuple): First slices where the ball crosses the blue and orange goal lines, see goal_threats
+        planner (AnytimePlanner): Chooses the next state when the current one expires, None with background planning
+        planning_budget (float): Seconds per tick the planner may spend, set by planning_budget_ms in bot.cfg
+        worker (PlanningWorker): Runs the planner in the background when background_planning is set in bot.cfg,
+            otherwise None
+        telemetry (TelemetryPublisher): Streams per-tick records when telemetry_port is set in bot.cfg, otherwise None
+        profiler (TickProfiler): Profiles every Nth tick when profile_every is set in bot.cfg, otherwise None
+        allocations (AllocationCounter): Reports allocations every N ticks when allocation_check_ticks is set in
+            bot.cfg, otherwise None
+        match_log (MatchLogWriter): Records every tick once the first tick arrives when log_matches is set in bot.cfg,
+            otherwise None
     
     """
+    planning_budget = 0.004
+    background_planning = False
+    plan_staleness = 0.1
+    telemetry_port = 0
+    profile_every = 0
+    allocation_check_ticks = 0
+    log_matches = False
+
+    @staticmethod
+    def create_agent_configurations(config: ConfigObject):
+        """Declares the custom settings the bot reads from the Bot Parameters section of bot.cfg"""
+        params = config.get_header(BOT_CONFIG_AGENT_HEADER)
+        params.add_value('planning_budget_ms', float, default=4.0,
+                         description='Milliseconds per tick the planner may spend choosing a state')
+        params.add_value('background_planning', bool, default=False,
+                         description='Run the planner on a background thread instead of inside the tick')
+        params.add_value('plan_staleness_ms', float, default=100.0,
+                         description='Milliseconds of game time after which a background plan is ignored')
+        params.add_value('telemetry_port', int, default=0,
+                         description='Local UDP port to stream telemetry to, or 0 to disable telemetry')
+        params.add_value('profile_every', int, default=0,
+                         description='Profile one tick in this many into src/profiles, or 0 to disable profiling')
+        params.add_value('allocation_check_ticks', int, default=0,
+                         description='Debug mode: log allocations every this many ticks, or 0 to disable the check')
+        params.add_value('log_matches', bool, default=False,
+                         description='Record every tick of each match into a columnar log in src/matches')
+
+    def load_config(self, config_header):
+        """Loads the custom settings from bot.cfg. Runs before initialize_agent."""
+        self.planning_budget = config_header.getfloat('planning_budget_ms') / 1000
+        self.background_planning = config_header.getboolean('background_planning')
+        self.plan_staleness = config_header.getfloat('plan_staleness_ms') / 1000
+        self.telemetry_port = config_header.getint('telemetry_port')
+        self.profile_every = config_header.getint('profile_every')
+        self.allocation_check_ticks = config_header.getint('allocation_check_ticks')
+        self.log_matches = config_header.getboolean('log_matches')
 
     def initialize_agent(self):
         """The setup function that runs once when the bot is created."""
         self.controller_state = SimpleControllerState()
+        self.aim_scratch = Vec3(0,0,0)
+        self.local_scratch = Vec3(0,0,0)
+        self.aim_target = Vec3(0,0,0)
         self.me = Car()
         self.ball = Ball()
+        self.opponents = []
+        self.boost_pads = BoostPadTracker()
+        self.aerial = None
         
         self.state = Shoot()
         self.controller = groundController
         self.stateMessage = "Whoops"
         
-        self.timer1 = time.time()
+        self.maneuvers = ManeuverScheduler()
+        self.kickoffs = load_kickoffs()
+        self.game_time = 0.0
+        self.frame_num = 0
+        self.ball_prediction = None
+        self.goal_threats = (None, None)
+        self.planner = None
+        self.worker = None
+        if self.background_planning:
+            self.worker = PlanningWorker(self.planning_budget, self.plan_staleness)
+            self.worker.start()
+        else:
+            self.planner = AnytimePlanner(self.planning_budget)
+        self.telemetry = None
+        if self.telemetry_port:
+            self.telemetry = TelemetryPublisher(self.telemetry_port)
+            self.telemetry.start()
+        self.profiler = None
+        if self.profile_every > 0:
+            self.profiler = TickProfiler(self.profile_every, f"{self.name}-{self.index}")
+        self.allocations = None
+        if self.allocation_check_ticks > 0:
+            self.allocations = AllocationCounter(self.allocation_check_ticks)
+            self.allocations.start()
+        self.match_log = None
 
     def get_output(self, gamePacket: GameTickPacket) -> SimpleControllerState:
         """Calculates the next set of commands for the bot.
         
-        This function should run 60 times a second, or once for every game tick. This function also calls a set
-        of commands to draw debug information on screen.
+        This function should run 60 times a second, or once for every game tick. When profiling is enabled, every
+        Nth tick is run under the profiler and recorded against the behavior that was active when it finished.
+        
+        Args:
+            gamePacket (GameTickPacket): set of current information about the game
+            
+        Returns:
+            SimpleControllerState: the next set of commands for the bot
+            
+        """
+        if self.profiler is not None and self.profiler.due():
+            controller_state, profile = self.profiler.run(self.tick, gamePacket)
+            self.profiler.add(self.behavior_name(), profile)
+        else:
+            controller_state = self.tick(gamePacket)
+        if self.allocations is not None:
+            report = self.allocations.tick()
+            if report is not None:
+                self.logger.info(report)
+        return controller_state
+    
+    def tick(self, gamePacket: GameTickPacket) -> SimpleControllerState:
+        """Runs one tick of the bot and draws debug information on screen.
         
         Args:
             gamePacket (GameTickPacket): set of current information about the game
@@ -91,22 +216,18 @@ class MyBot(BaseAgent):
             SimpleControllerState: the next set of commands for the bot
             
         """
+        start = time.perf_counter()
         self.preprocess(gamePacket)
-                
-        if self.state.expired == True:
-            if AimShot().checkAvailable(self) == True:
-                self.state = AimShot()
-                self.stateMessage = "Aiming"
-            #if Shoot().checkAvailable(self) == True:
-            #    self.state = Shoot()
-            #    self.stateMessage = "Shooting"
-            elif Defend().checkAvailable(self) == True:
-                self.state = Defend()
-                self.stateMessage = "Defending"
-            else:
-                self.state = BallChase()
-                self.stateMessage = "Chasing"
-        controller_state = self.state.execute(self)
+        self.check_kickoff(gamePacket)
+        preprocessed = time.perf_counter()
+        
+        controller_state = self.maneuvers.execute(self)
+        if controller_state is None:
+            controller_state = self.choose_state()
+        decided = time.perf_counter()
+        
+        if self.log_matches:
+            self.record_match(gamePacket, controller_state)
         
         team = sign(self.team)
         ball_side = sign(self.ball.location.y)
@@ -114,11 +235,87 @@ class MyBot(BaseAgent):
         my_car = gamePacket.game_cars[self.index]
         message = f"{self.stateMessage} | Team {team} | Ball {ball_side} "
         action_display = message
-        ball_path = predict_ball_path(self)
+        ball_path = self.ball_prediction[1]
         draw_debug(self.renderer, my_car, gamePacket.game_ball, action_display, ball_path)
+        
+        if self.telemetry is not None:
+            rendered = time.perf_counter()
+            timings = ((preprocessed - start) * 1000, (decided - preprocessed) * 1000, (rendered - decided) * 1000,
+                       (rendered - start) * 1000)
+            frame = pack_frame(self, self.behavior_name(), timings, self.aim_target, controller_state)
+            self.telemetry.publish(frame)
 
         return controller_state
     
+    def behavior_name(self):
+        """Gives the name of the running maneuver, or of the current state's class if there is none"""
+        if self.maneuvers.active is not None:
+            return self.maneuvers.active.name
+        return type(self.state).__name__
+    
+    def record_match(self, gamePacket: GameTickPacket, controller_state: SimpleControllerState):
+        """Adds the tick to the match log, starting the log on the first tick when the number of cars is known"""
+        if self.match_log is None:
+            directory = new_match_directory(f"{self.name}-{self.index}")
+            self.match_log = MatchLogWriter(directory, self.team, gamePacket.num_cars)
+        self.match_log.append(self, gamePacket, self.behavior_name(), controller_state)
+    
+    def check_kickoff(self, gamePacket: GameTickPacket):
+        """Starts the precomputed kickoff when a kickoff begins and stops it once the ball is in play.
+        
+        Args:
+            gamePacket (GameTickPacket): set of current information about the game
+            
+        """
+        game_info = gamePacket.game_info
+        kickoff = game_info.is_kickoff_pause and game_info.is_round_active
+        running = isinstance(self.maneuvers.active, Kickoff)
+        if running and not kickoff:
+            self.maneuvers.cancel()
+        elif kickoff and not running and self.me.velocity.length() < 1:
+            slot = spawn_slot(self.me.location, self.team)
+            if slot in self.kickoffs:
+                self.maneuvers.request(Kickoff(self.kickoffs[slot]), self.game_time)
+                self.stateMessage = "Kickoff"
+    
+    def choose_state(self):
+        """Replaces the current state with the planner's choice if it has expired, then executes it.
+        
+        The planner only spends its budget on the ticks where a new state is needed, since its choice is thrown
+        away while the current state is still active. With background planning the worker keeps planning from the
+        newest snapshot, the freshest finished plan is used instead, and the fixed reactive choice is used whenever
+        that plan is missing or stale.
+        
+        Returns:
+            SimpleControllerState: the commands given by the current state
+            
+        """
+        if self.worker is not None:
+            self.worker.submit(Snapshot(self))
+        if self.state.expired == True:
+            if self.worker is None:
+                self.state, self.stateMessage = self.planner.choose(self)
+            else:
+                plan = self.worker.latest(self.game_time)
+                if plan is not None:
+                    self.state, self.stateMessage = plan.state_class(), plan.message
+                else:
+                    self.state, self.stateMessage = reactive_choice(self)
+        return self.state.execute(self)
+    
+    def retire(self):
+        """Stops the background threads and writes any unsaved profiles when the bot is shut down."""
+        if self.worker is not None:
+            self.worker.stop()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        if self.profiler is not None:
+            self.profiler.flush()
+        if self.allocations is not None:
+            self.allocations.stop()
+        if self.match_log is not None:
+            self.match_log.close()
+    
     def preprocess(self, gamePacket: GameTickPacket):
         """Calculates a set of values that may be useful.
         
@@ -132,12 +329,22 @@ class MyBot(BaseAgent):
             This function updates the attributes of the class and therefore has no return type. 
             
         """
+        self.game_time = gamePacket.game_info.seconds_elapsed
+        self.frame_num = gamePacket.game_info.frame_num
+        
+        #ball-only analysis is shared with every other bot in this process, and only redone when the prediction changes
+        ball_analysis = SHARED_CACHE.get(self.frame_num, 'ball_analysis',
+                                         lambda: ingest_prediction(self.get_ball_prediction_struct()))
+        self.ball_prediction, self.goal_threats = ball_analysis
+        ball_times, ball_locations = self.ball_prediction
+        
         #load data about self
         self.me.location = Vec3(gamePacket.game_cars[self.index].physics.location)
         self.me.velocity = Vec3(gamePacket.game_cars[self.index].physics.velocity)
         self.me.rotation = Orientation(gamePacket.game_cars[self.index].physics.rotation)
         self.me.rvelocity = Vec3(gamePacket.game_cars[self.index].physics.angular_velocity)
         self.me.boost = gamePacket.game_cars[self.index].boost
+        self.me.on_ground = gamePacket.game_cars[self.index].has_wheel_contact
         
         #load data about the ball
         self.ball.location = Vec3(gamePacket.game_ball.physics.location)
@@ -145,7 +352,22 @@ class MyBot(BaseAgent):
         self.ball.rotation = Orientation(gamePacket.game_ball.physics.rotation)
         self.ball.rvelocity = Vec3(gamePacket.game_ball.physics.angular_velocity)
         
-        self.ball.local_location = relative_location(self.me.location, self.me.rotation, self.ball.location)
+        relative_location(self.me.location, self.me.rotation, self.ball.location, self.ball.local_location)
+        
+        #load data about the opponents
+        self.opponents = []
+        for i in range(gamePacket.num_cars):
+            car = gamePacket.game_cars[i]
+            if car.team != self.team and not car.is_demolished:
+                opponent = Car()
+                opponent.location = Vec3(car.physics.location)
+                opponent.velocity = Vec3(car.physics.velocity)
+                opponent.boost = car.boost
+                self.opponents.append(opponent)
+        
+        self.boost_pads.update(gamePacket, self.game_time)
+        
+        self.aerial = aerial_reachability(self.me, ball_times, ball_locations, self.game_time)
 
 
 def draw_debug(renderer, car, ball, action_display, ball_path = None):
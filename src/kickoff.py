@@ -0,0 +1,176 @@
+import math
+import os
+import struct
+
+from rlbot.agents.base_agent import SimpleControllerState
+
+from maneuvers import Maneuver
+from util.vec import Vec3
+
+"""Kickoff spawn slots for the blue team as (x, y, yaw). Orange spawns are the same points rotated by pi."""
+SPAWNS = {
+    0: (-2048.0, -2560.0, math.pi / 4), #diagonal, right side
+    1: (2048.0, -2560.0, 3 * math.pi / 4), #diagonal, left side
+    2: (-256.0, -3840.0, math.pi / 2), #off center, right side
+    3: (256.0, -3840.0, math.pi / 2), #off center, left side
+    4: (0.0, -4608.0, math.pi / 2), #goal
+}
+SPAWN_TOLERANCE = 100 #uu, how far the car can be from a spawn point and still be recognized
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kickoffs.bin')
+TABLE_MAGIC = b'KOFF'
+TABLE_VERSION = 1
+TICK_RATE = 60 #table entries per second of game time
+
+"""Binary layout: a header, then for each slot a slot header followed by one frame per tick"""
+HEADER = struct.Struct('<4sBB') #magic, version, slot count
+SLOT_HEADER = struct.Struct('<BH') #slot, tick count
+FRAME = struct.Struct('<bbB') #throttle * 127, steer * 127, flags
+FLAG_BOOST = 1
+FLAG_JUMP = 2
+
+def spawn_slot(location: Vec3, team):
+    """Finds the kickoff spawn slot the car is sitting on.
+
+    Args:
+        location (Vec3): the car's location
+        team (int): the car's team
+
+    Returns:
+        int: the slot, or None if the car is not on a kickoff spawn
+
+    """
+    x, y = location.x, location.y
+    if team == 1:
+        x, y = -x, -y
+    for slot, (spawn_x, spawn_y, yaw) in SPAWNS.items():
+        if math.hypot(x - spawn_x, y - spawn_y) < SPAWN_TOLERANCE:
+            return slot
+    return None
+
+def encode_frame(throttle, steer, boost, jump):
+    """Packs one tick of inputs into a frame"""
+    flags = (FLAG_BOOST if boost else 0) | (FLAG_JUMP if jump else 0)
+    return FRAME.pack(int(round(throttle * 127)), int(round(steer * 127)), flags)
+
+def decode_frame(data, offset):
+    """Unpacks one frame into a SimpleControllerState"""
+    throttle, steer, flags = FRAME.unpack_from(data, offset)
+    controllerState = SimpleControllerState()
+    controllerState.throttle = throttle / 127
+    controllerState.steer = steer / 127
+    controllerState.boost = bool(flags & FLAG_BOOST)
+    controllerState.jump = bool(flags & FLAG_JUMP)
+    return controllerState
+
+def save_kickoffs(sequences, path=TABLE_FILE):
+    """Writes kickoff sequences to a table file.
+
+    Args:
+        sequences (dict): Maps slots to lists of (throttle, steer, boost, jump) tuples, one per tick
+
+    """
+    with open(path, 'wb') as table:
+        table.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(sequences)))
+        for slot, frames in sorted(sequences.items()):
+            table.write(SLOT_HEADER.pack(slot, len(frames)))
+            for frame in frames:
+                table.write(encode_frame(*frame))
+
+def load_kickoffs(path=TABLE_FILE):
+    """Reads the kickoff table, decoding every tick up front so replaying it costs nothing.
+
+    Returns:
+        dict: Maps slots to lists of SimpleControllerStates, empty if the table is missing or unreadable
+
+    """
+    try:
+        with open(path, 'rb') as table:
+            data = table.read()
+        magic, version, count = HEADER.unpack_from(data, 0)
+    except (OSError, struct.error):
+        return {}
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        return {}
+    kickoffs = {}
+    offset = HEADER.size
+    for i in range(count):
+        slot, ticks = SLOT_HEADER.unpack_from(data, offset)
+        offset += SLOT_HEADER.size
+        kickoffs[slot] = [decode_frame(data, offset + tick * FRAME.size) for tick in range(ticks)]
+        offset += ticks * FRAME.size
+    return kickoffs
+
+class Kickoff(Maneuver):
+    """Replays a precomputed kickoff sequence tick by tick.
+
+    The tick is found from the game time elapsed since the kickoff started, so the replay stays in step even if
+    packets are skipped.
+
+    """
+    name = "Kickoff"
+    priority = 2
+    interruptible = True
+
+    def __init__(self, frames):
+        """Creates an unstarted kickoff from a list of SimpleControllerStates"""
+        super().__init__([])
+        self.frames = frames
+        self.duration = len(frames) / TICK_RATE
+
+    def execute(self, agent):
+        """Gives the recorded inputs for the current tick"""
+        tick = int(self.elapsed(agent.game_time) * TICK_RATE)
+        return self.frames[min(tick, len(self.frames) - 1)]
+
+def generate_kickoffs(max_ticks=180, segment=6, lookahead=30):
+    """Searches for a kickoff sequence from every spawn slot using the headless car model.
+
+    Every segment the search tries each steering value held for the segment and then driving straight, and keeps
+    the one whose path gets closest to the ball. The car boosts the whole way and the sequence ends once the car is
+    close enough for shotController to take over with a flip.
+
+    Returns:
+        dict: Maps slots to lists of (throttle, steer, boost, jump) tuples
+
+    """
+    import numpy as np
+    from util.dynamics import Controls, simulate
+    from util.orientation import Orientation
+    from util.util import BALL_RADIUS, BOOST_START_AMOUNT, CAR_REST_HEIGHT
+    from bot import Car
+
+    steer_values = np.linspace(-1.0, 1.0, 9)
+    target = np.array([0.0, -BALL_RADIUS, CAR_REST_HEIGHT])
+    sequences = {}
+    for slot, (x, y, yaw) in SPAWNS.items():
+        car = Car()
+        car.location = Vec3(x, y, CAR_REST_HEIGHT)
+        car.velocity = Vec3(0, 0, 0)
+        car.rotation = Orientation(0, yaw, 0)
+        car.boost = BOOST_START_AMOUNT
+        frames = []
+        while len(frames) < max_ticks and car.location.dist(Vec3(*target)) > 400:
+            ticks = segment + lookahead
+            steer = np.zeros((len(steer_values), ticks))
+            steer[:, :segment] = steer_values[:, None]
+            throttle = np.ones(steer.shape)
+            boost = np.ones(steer.shape, dtype=bool)
+            search = simulate(car, Controls(throttle, steer, boost), target)
+            best = search.best()
+
+            chosen = Controls(throttle[best:best + 1, :segment], steer[best:best + 1, :segment],
+                              boost[best:best + 1, :segment])
+            result = simulate(car, chosen)
+            car.location = Vec3(*result.location[0])
+            car.velocity = Vec3(result.speed[0] * math.cos(result.yaw[0]), result.speed[0] * math.sin(result.yaw[0]), 0)
+            car.rotation = Orientation(0, result.yaw[0], 0)
+            car.boost = result.boost[0]
+            frames.extend([(1.0, float(steer_values[best]), True, False)] * segment)
+        sequences[slot] = frames
+    return sequences
+
+if __name__ == '__main__':
+    save_kickoffs(generate_kickoffs())
+    for slot, frames in sorted(load_kickoffs().items()):
+        print(f"slot {slot}: {len(frames)} ticks")
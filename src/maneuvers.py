@@ -0,0 +1,253 @@
+import math
+
+from util.orientation import relative_location
+from util.util import JUMP_MAX_DURATION
+from util.vec import Vec3
+
+"""Aerial Control"""
+AERIAL_TURN_GAIN = 3.0 #stick input per radian between the car's nose and the intercept
+AERIAL_BOOST_ANGLE = 0.5 #rad, boost only while the nose points at least this close to the intercept
+
+class Step():
+    """A single segment of a maneuver's timeline.
+
+    Attributes:
+        duration (float): How long the step lasts in seconds of game time
+        action (function): Called as action(agent, controllerState) every tick the step is active. The action
+            should write its commands directly into the given controller state.
+
+    """
+    def __init__(self, duration, action):
+        """Creates a new Step"""
+        self.duration = duration
+        self.action = action
+
+class Maneuver():
+    """Maneuvers are fixed sequences of commands that span multiple ticks.
+
+    A Maneuver is declared as a timeline of Steps and is driven by game time rather than wall-clock time, so it
+    behaves the same no matter how fast the game is being simulated. Once started a maneuver overrides the
+    bot's State until its timeline runs out or it is preempted by a maneuver of higher priority.
+
+    Attributes:
+        name (str): Unique name of the maneuver, used for cooldowns
+        timeline (list): The Steps to execute in order
+        priority (int): Maneuvers may only be preempted by maneuvers with a strictly higher priority
+        interruptible (bool): Whether the maneuver can be preempted at all
+        start_time (float): Game time the maneuver was started, or None if it has not started
+
+    """
+    name = "Maneuver"
+    priority = 0
+    interruptible = True
+
+    def __init__(self, timeline):
+        """Creates an unstarted maneuver from a list of Steps"""
+        self.timeline = timeline
+        self.start_time = None
+        self.duration = sum(step.duration for step in timeline)
+
+    def start(self, game_time):
+        """Marks the maneuver as started at the given game time"""
+        self.start_time = game_time
+
+    def elapsed(self, game_time):
+        """Returns the game time in seconds since the maneuver started"""
+        return game_time - self.start_time
+
+    def finished(self, game_time):
+        """Determines if the timeline has run out"""
+        return self.start_time is None or self.elapsed(game_time) >= self.duration
+
+    def execute(self, agent):
+        """Executes the active step of the timeline.
+
+        Attributes:
+            agent (BaseAgent): The bot
+
+        Returns:
+            SimpleControllerState: the set of commands for the current step, written into the agent's controller_state
+
+        """
+        controllerState = reset_controls(agent.controller_state)
+        step_end = 0.0
+        elapsed = self.elapsed(agent.game_time)
+        for step in self.timeline:
+            step_end += step.duration
+            if elapsed < step_end:
+                step.action(agent, controllerState)
+                break
+        return controllerState
+
+class ManeuverScheduler():
+    """Holds the single active maneuver of a car and decides when a new maneuver may replace it.
+
+    Preemption rules:
+        A requested maneuver starts if no maneuver is active or the active one has finished.
+        Otherwise it only starts if the active maneuver is interruptible and the new one has a higher priority.
+        A maneuver is refused while its cooldown, measured from its previous start, has not elapsed.
+
+    Attributes:
+        active (Maneuver): The currently running maneuver, or None
+        last_started (dict): Maps maneuver names to the game time they were last started
+
+    """
+    def __init__(self):
+        """Creates a scheduler with no active maneuver"""
+        self.active = None
+        self.last_started = {}
+
+    def busy(self, game_time):
+        """Determines if a maneuver is currently running"""
+        return self.active is not None and not self.active.finished(game_time)
+
+    def cooldown_elapsed(self, name, game_time, cooldown):
+        """Determines if at least cooldown seconds of game time have passed since the named maneuver last started"""
+        last = self.last_started.get(name)
+        return last is None or game_time - last >= cooldown or game_time < last
+
+    def request(self, maneuver, game_time, cooldown=0.0):
+        """Attempts to start a maneuver.
+
+        Attributes:
+            maneuver (Maneuver): the maneuver to start
+            game_time (float): the current game time
+            cooldown (float): minimum game time in seconds between starts of maneuvers with the same name
+
+        Returns:
+            bool: True if the maneuver was started
+
+        """
+        if not self.cooldown_elapsed(maneuver.name, game_time, cooldown):
+            return False
+        if self.busy(game_time):
+            if not self.active.interruptible or maneuver.priority <= self.active.priority:
+                return False
+        maneuver.start(game_time)
+        self.active = maneuver
+        self.last_started[maneuver.name] = game_time
+        return True
+
+    def cancel(self):
+        """Stops the active maneuver"""
+        self.active = None
+
+    def execute(self, agent):
+        """Runs the active maneuver for one tick.
+
+        Returns:
+            SimpleControllerState: the maneuver's commands, or None if no maneuver is running
+
+        """
+        if not self.busy(agent.game_time):
+            self.active = None
+            return None
+        return self.active.execute(agent)
+
+def reset_controls(controllerState):
+    """Returns every input of a reused SimpleControllerState to neutral, so nothing carries over from the last tick"""
+    controllerState.throttle = 0.0
+    controllerState.steer = 0.0
+    controllerState.pitch = 0.0
+    controllerState.yaw = 0.0
+    controllerState.roll = 0.0
+    controllerState.jump = False
+    controllerState.boost = False
+    controllerState.handbrake = False
+    controllerState.use_item = False
+    return controllerState
+
+def turn_toward_ball(agent, controllerState):
+    """Sets yaw to turn the car toward the ball"""
+    ball_direction = agent.ball.local_location
+    ball_angle = -math.atan2(ball_direction.y, ball_direction.x)
+    if ball_angle > 0:
+        controllerState.yaw = -1
+    elif ball_angle < 0:
+        controllerState.yaw = 1
+
+def jump_and_turn(agent, controllerState):
+    """Holds jump while turning toward the ball"""
+    controllerState.jump = True
+    turn_toward_ball(agent, controllerState)
+
+def release_and_turn(agent, controllerState):
+    """Releases jump so that the second jump registers as a flip"""
+    controllerState.jump = False
+    turn_toward_ball(agent, controllerState)
+
+def flip_forward(agent, controllerState):
+    """Flips forward while turning toward the ball"""
+    jump_and_turn(agent, controllerState)
+    controllerState.pitch = -1
+
+class FlipShot(Maneuver):
+    """Jumps, turns toward the ball, and flips into it.
+
+    The flip can not be interrupted once it has started.
+
+    """
+    name = "FlipShot"
+    priority = 1
+    interruptible = False
+    cooldown = 2.2
+
+    def __init__(self):
+        """Creates an unstarted FlipShot"""
+        super().__init__([
+            Step(0.1, jump_and_turn),
+            Step(0.05, release_and_turn),
+            Step(0.85, flip_forward),
+        ])
+
+class AerialShot(Maneuver):
+    """Jumps and flies into the ball at a predicted intercept.
+
+    The intercept should be one aerial_reachability found feasible this tick, since that check assumes the car jumps
+    straight away. After the jump the car keeps its nose turned toward the intercept and boosts whenever it points
+    close enough to it. Once airborne the car is committed, so the aerial can not be interrupted.
+
+    Attributes:
+        target (Vec3): Where the car should meet the ball
+        arrival_time (float): Game time the ball reaches the target
+
+    """
+    name = "AerialShot"
+    priority = 1
+    interruptible = False
+    cooldown = 3.0
+
+    def __init__(self, target, arrival_time, game_time):
+        """Creates an unstarted AerialShot that reaches target at arrival_time, when requested at game_time"""
+        self.target = Vec3(target)
+        self.arrival_time = arrival_time
+        jump = JUMP_MAX_DURATION / 1000
+        super().__init__([
+            Step(jump, self.jump_toward_target),
+            Step(max(arrival_time - game_time - jump, 0.0), self.fly_toward_target),
+        ])
+
+    def turn_toward_target(self, agent, controllerState):
+        """Sets pitch and yaw to point the nose at the target.
+
+        Returns:
+            float: the angle in radians between the nose and the target
+
+        """
+        agent.aim_target.set(self.target.x, self.target.y, self.target.z)
+        local = relative_location(agent.me.location, agent.me.rotation, self.target, agent.local_scratch)
+        yaw_angle = math.atan2(local.y, local.x)
+        pitch_angle = math.atan2(local.z, math.hypot(local.x, local.y))
+        controllerState.yaw = max(-1.0, min(1.0, yaw_angle * AERIAL_TURN_GAIN))
+        controllerState.pitch = max(-1.0, min(1.0, pitch_angle * AERIAL_TURN_GAIN))
+        return math.acos(max(-1.0, min(1.0, local.x / max(local.length(), 1e-6))))
+
+    def jump_toward_target(self, agent, controllerState):
+        """Holds jump for the full jump while turning toward the target"""
+        controllerState.jump = True
+        self.turn_toward_target(agent, controllerState)
+
+    def fly_toward_target(self, agent, controllerState):
+        """Turns toward the target and boosts once the nose points at it"""
+        if self.turn_toward_target(agent, controllerState) < AERIAL_BOOST_ANGLE:
+            controllerState.boost = True
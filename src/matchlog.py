@@ -0,0 +1,288 @@
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from telemetry import FLAG_BOOST, FLAG_HANDBRAKE, FLAG_JUMP
+from util.util import GOAL_HOME, sign
+
+MATCH_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'matches')
+LOG_VERSION = 1
+CHUNK_TICKS = 600 #ticks per chunk, 10 seconds of game time
+COMPRESSION_LEVEL = 1 #zlib level, low so flushing a chunk stays cheap on the tick thread
+INDEX_FILE = 'index.json'
+COLUMN_SUFFIX = '.col'
+
+def match_columns(num_cars):
+    """Lists the columns of a match log as (name, dtype, shape) tuples.
+
+    time holds the game time of each tick and is the index of the log. state holds indexes into the state names
+    kept in index.json, and buttons holds the telemetry button flags.
+
+    """
+    columns = [
+        ('time', '<f8', ()),
+        ('frame', '<i4', ()),
+        ('state', 'u1', ()),
+        ('controls', '<f4', (5,)), #throttle, steer, pitch, yaw, roll
+        ('buttons', 'u1', ()),
+        ('ball_location', '<f4', (3,)),
+        ('ball_velocity', '<f4', (3,)),
+    ]
+    for i in range(num_cars):
+        columns += [
+            (f'car{i}_location', '<f4', (3,)),
+            (f'car{i}_velocity', '<f4', (3,)),
+            (f'car{i}_rotation', '<f4', (3,)), #pitch, yaw, roll
+            (f'car{i}_boost', '<f4', ()),
+        ]
+    return columns
+
+class MatchLogWriter():
+    """Records every tick of a match into a directory of column files.
+
+    Each column is written to its own file as a sequence of blocks, one per chunk of CHUNK_TICKS ticks. Blocks are
+    zlib compressed, except for the time column, which is stored raw so readers can memory-map it as the index.
+    After every chunk index.json is rewritten with the offset and size of each block, so a log is readable even
+    if the bot stops without closing it.
+
+    Attributes:
+        directory (str): The match directory being written
+        ticks (int): Ticks written to disk so far
+
+    """
+    def __init__(self, directory, team, num_cars, chunk_ticks=CHUNK_TICKS, compress=True):
+        """Creates the match directory and an empty log"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ticks = 0
+        self.chunk_ticks = chunk_ticks
+        self.columns = match_columns(num_cars)
+        self.index = {
+            'version': LOG_VERSION,
+            'team': team,
+            'num_cars': num_cars,
+            'chunk_ticks': chunk_ticks,
+            'columns': {name: {'dtype': dtype, 'shape': list(shape),
+                               'compression': 'zlib' if compress and name != 'time' else 'none'}
+                        for name, dtype, shape in self.columns},
+            'states': [],
+            'chunks': [],
+        }
+        self._states = {}
+        self._rows = {name: np.zeros((chunk_ticks,) + shape, dtype=dtype) for name, dtype, shape in self.columns}
+        self._count = 0
+        self._files = {name: open(os.path.join(directory, name + COLUMN_SUFFIX), 'wb') for name, _, _ in self.columns}
+
+    def append(self, agent, gamePacket, state_name, controller_state):
+        """Adds one tick, writing a chunk once enough ticks are collected"""
+        rows = self._rows
+        n = self._count
+        rows['time'][n] = agent.game_time
+        rows['frame'][n] = agent.frame_num
+        rows['state'][n] = self.state_code(state_name)
+        rows['controls'][n] = (controller_state.throttle, controller_state.steer, controller_state.pitch,
+                               controller_state.yaw, controller_state.roll)
+        rows['buttons'][n] = ((FLAG_JUMP if controller_state.jump else 0) | (FLAG_BOOST if controller_state.boost else 0)
+                              | (FLAG_HANDBRAKE if controller_state.handbrake else 0))
+        ball = gamePacket.game_ball.physics
+        rows['ball_location'][n] = (ball.location.x, ball.location.y, ball.location.z)
+        rows['ball_velocity'][n] = (ball.velocity.x, ball.velocity.y, ball.velocity.z)
+        for i in range(min(gamePacket.num_cars, self.index['num_cars'])):
+            car = gamePacket.game_cars[i]
+            physics = car.physics
+            rows[f'car{i}_location'][n] = (physics.location.x, physics.location.y, physics.location.z)
+            rows[f'car{i}_velocity'][n] = (physics.velocity.x, physics.velocity.y, physics.velocity.z)
+            rows[f'car{i}_rotation'][n] = (physics.rotation.pitch, physics.rotation.yaw, physics.rotation.roll)
+            rows[f'car{i}_boost'][n] = car.boost
+        self._count += 1
+        if self._count == self.chunk_ticks:
+            self.flush()
+
+    def state_code(self, state_name):
+        """Gives the number a state name is stored as, adding new names to the index"""
+        code = self._states.get(state_name)
+        if code is None:
+            code = len(self.index['states'])
+            self._states[state_name] = code
+            self.index['states'].append(state_name)
+        return code
+
+    def flush(self):
+        """Writes the collected ticks as a chunk and rewrites the index"""
+        if self._count == 0:
+            return
+        count = self._count
+        blocks = {}
+        for name, dtype, shape in self.columns:
+            data = self._rows[name][:count].tobytes()
+            if self.index['columns'][name]['compression'] == 'zlib':
+                data = zlib.compress(data, COMPRESSION_LEVEL)
+            column_file = self._files[name]
+            blocks[name] = [column_file.tell(), len(data)]
+            column_file.write(data)
+            column_file.flush()
+        times = self._rows['time']
+        self.index['chunks'].append({
+            'first_tick': self.ticks,
+            'ticks': count,
+            'start_time': float(times[0]),
+            'end_time': float(times[count - 1]),
+            'blocks': blocks,
+        })
+        self.ticks += count
+        self._count = 0
+        self.write_index()
+
+    def write_index(self):
+        """Replaces index.json in one step, so readers never see half of it"""
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w') as index_file:
+            json.dump(self.index, index_file)
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        """Writes the remaining ticks and closes the column files"""
+        self.flush()
+        for column_file in self._files.values():
+            column_file.close()
+
+def new_match_directory(name, directory=MATCH_DIRECTORY):
+    """Gives a fresh directory for a match, named after the time it started and the bot"""
+    return os.path.join(directory, time.strftime('%Y%m%d-%H%M%S') + '-' + name)
+
+class MatchLog():
+    """Reads a match log written by MatchLogWriter.
+
+    Only index.json is read up front. Raw columns are memory-mapped and compressed columns are decompressed one
+    chunk at a time, so looking at one moment or one column never touches the rest of the log.
+
+    Attributes:
+        directory (str): The match directory
+        index (dict): The contents of index.json
+        states (list): The state names, indexed by the values of the state column
+        times (ndarray): The game time of every tick, memory-mapped
+
+    """
+    def __init__(self, directory):
+        """Opens a match log"""
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as index_file:
+            self.index = json.load(index_file)
+        self.states = self.index['states']
+        self.chunks = self.index['chunks']
+        self.ticks = sum(chunk['ticks'] for chunk in self.chunks)
+        self._chunk_starts = np.array([chunk['first_tick'] for chunk in self.chunks], dtype=int)
+        self.times = self.column('time')
+
+    @property
+    def own_goal(self):
+        """The center of the logging bot's goal on the ground"""
+        return np.array([0.0, GOAL_HOME.y * sign(self.index['team']), 0.0])
+
+    def column_info(self, name):
+        """Gives the dtype, shape and compression of a column"""
+        info = self.index['columns'][name]
+        return np.dtype(info['dtype']), tuple(info['shape']), info['compression']
+
+    def column(self, name):
+        """Gives every tick of a column, memory-mapped if the column is stored raw"""
+        dtype, shape, compression = self.column_info(name)
+        if compression == 'none':
+            if self.ticks == 0:
+                return np.zeros((0,) + shape, dtype=dtype)
+            return np.memmap(self.path(name), dtype=dtype, mode='r', shape=(self.ticks,) + shape)
+        return self.read(name, 0, self.ticks)
+
+    def chunk(self, name, chunk_number):
+        """Decodes one chunk of a column"""
+        dtype, shape, compression = self.column_info(name)
+        offset, size = self.chunks[chunk_number]['blocks'][name]
+        with open(self.path(name), 'rb') as column_file:
+            column_file.seek(offset)
+            data = column_file.read(size)
+        if compression == 'zlib':
+            data = zlib.decompress(data)
+        return np.frombuffer(data, dtype=dtype).reshape((-1,) + shape)
+
+    def read(self, name, start, stop):
+        """Gives ticks start to stop of a column, decoding only the chunks they are in"""
+        dtype, shape, compression = self.column_info(name)
+        start = max(start, 0)
+        stop = min(stop, self.ticks)
+        if stop <= start:
+            return np.zeros((0,) + shape, dtype=dtype)
+        if compression == 'none':
+            return np.array(self.column(name)[start:stop])
+        first = self.chunk_of(start)
+        last = self.chunk_of(stop - 1)
+        data = np.concatenate([self.chunk(name, i) for i in range(first, last + 1)])
+        offset = self._chunk_starts[first]
+        return data[start - offset:stop - offset]
+
+    def chunk_of(self, tick):
+        """Gives the number of the chunk holding a tick"""
+        return int(np.searchsorted(self._chunk_starts, tick, side='right')) - 1
+
+    def tick_at(self, game_time):
+        """Gives the first tick at or after a game time"""
+        return int(np.searchsorted(self.times, game_time))
+
+    def seek(self, game_time, names, ticks=1):
+        """Reads a few ticks of some columns, starting at a game time.
+
+        Returns:
+            dict: Maps each column name to its values for the ticks
+
+        """
+        start = self.tick_at(game_time)
+        return {name: self.read(name, start, start + ticks) for name in names}
+
+    def query(self, state=None, ball_within=None):
+        """Finds the ticks matching all of the given conditions.
+
+        Chunks are checked one at a time and a chunk's ball locations are only decoded if its states matched.
+
+        Args:
+            state (str): Only ticks where this state or maneuver was active
+            ball_within (tuple): A location and radius, only ticks where the ball was within radius of the location
+
+        Returns:
+            ndarray: the matching tick numbers, which index times and every column
+
+        """
+        if state is not None and state not in self.states:
+            return np.zeros(0, dtype=int)
+        matches = []
+        for i, chunk in enumerate(self.chunks):
+            mask = np.ones(chunk['ticks'], dtype=bool)
+            if state is not None:
+                mask &= self.chunk('state', i) == self.states.index(state)
+            if ball_within is not None and mask.any():
+                location, radius = ball_within
+                offsets = self.chunk('ball_location', i) - np.asarray(location, dtype=np.float32)
+                mask &= (offsets * offsets).sum(axis=1) <= radius * radius
+            matches.append(np.nonzero(mask)[0] + chunk['first_tick'])
+        if not matches:
+            return np.zeros(0, dtype=int)
+        return np.concatenate(matches)
+
+    def path(self, name):
+        """Gives the file a column is stored in"""
+        return os.path.join(self.directory, name + COLUMN_SUFFIX)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python matchlog.py <match directory> [<state> [<radius of the ball from our goal>]]")
+    else:
+        log = MatchLog(sys.argv[1])
+        print(f"{log.ticks} ticks in {len(log.chunks)} chunks, states: {', '.join(log.states)}")
+        if len(sys.argv) > 2:
+            near_goal = (log.own_goal, float(sys.argv[3])) if len(sys.argv) > 3 else None
+            found = log.query(sys.argv[2], near_goal)
+            print(f"{len(found)} matching ticks")
+            for tick in found[:20]:
+                print(f"    tick {tick} at {log.times[tick]:.2f}s")
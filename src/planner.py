@@ -0,0 +1,224 @@
+import time
+
+import numpy as np
+
+import util.util as util
+from util.dynamics import candidate_controls, simulate
+from states import AimShot, Defend, BallChase
+
+"""Candidate states in the order the bot used to prefer them, with the message shown while they are active"""
+CANDIDATES = [
+    (AimShot, "Aiming"),
+    (Defend, "Defending"),
+    (BallChase, "Chasing"),
+]
+
+"""Base value of each state, in seconds of travel time the bot is willing to spend to use it"""
+STATE_VALUES = {
+    AimShot: 1.0,
+    Defend: 0.5,
+    BallChase: 0.0,
+}
+THREAT_VALUE = 2.0 #extra value of Defend while the predicted ball path enters the friendly goal
+
+"""Rollout fidelities, from cheapest to most accurate, as (seconds per step, steps)
+
+Every level looks 2 seconds ahead. A rollout costs roughly 50 to 110us per step, so even the most accurate level
+fits inside the default 4ms planning budget on a slow machine.
+"""
+FIDELITIES = [
+    (1 / 6, 12),
+    (1 / 10, 20),
+    (1 / 15, 30),
+]
+STEP_COST_ESTIMATE = 0.00015 #s, cautious cost of one rollout step, used until a rollout has been timed
+
+REACH_DISTANCE = 2 * util.BALL_RADIUS #uu, how close the car has to get to the aim location
+
+class Evaluation():
+    """The score of a candidate state from a single rollout.
+
+    Attributes:
+        score (float): Higher is better
+        fidelity (int): Index into FIDELITIES of the rollout that produced the score
+        game_time (float): The game time the rollout started at
+
+    """
+    def __init__(self, score, fidelity, game_time):
+        """Creates a new Evaluation"""
+        self.score = score
+        self.fidelity = fidelity
+        self.game_time = game_time
+
+class AnytimePlanner():
+    """Chooses the bot's next state by scoring every available state with short car and ball rollouts.
+
+    Each call to choose works until its time budget runs out, evaluating the states with the least accurate or
+    oldest scores first. Every new rollout of a state is one fidelity level above its previous score. Scores younger
+    than max_age seconds of game time are kept between ticks, so a small budget still converges on accurate scores
+    over consecutive ticks. A rollout is only started if its estimated cost still fits in the budget. Fidelities
+    that have not been timed yet are estimated from the timed ones by their number of steps. The best choice
+    found so far is always returned, falling back to the fixed priority order in CANDIDATES when nothing has been
+    scored yet.
+
+    Attributes:
+        budget (float): Wall-clock seconds the planner may spend per call
+        max_age (float): Seconds of game time an evaluation stays valid
+        evaluations (dict): Maps state classes to their latest Evaluation
+        costs (list): Running average of the wall-clock time of a rollout at each fidelity
+
+    """
+    def __init__(self, budget=0.004, max_age=0.25):
+        """Creates a planner with no evaluations"""
+        self.budget = budget
+        self.max_age = max_age
+        self.evaluations = {}
+        self.costs = [0.0] * len(FIDELITIES)
+        self.controls = [candidate_controls(steps) for step, steps in FIDELITIES]
+
+    def choose(self, agent):
+        """Picks the best available state.
+
+        Attributes:
+            agent (BaseAgent): The bot, or any object with the same me, ball, opponents, team, game_time,
+                ball_prediction and goal_threats attributes
+
+        Returns:
+            tuple: The chosen State instance and the message describing it
+
+        """
+        deadline = time.perf_counter() + self.budget
+        available = []
+        for state_class, message in CANDIDATES:
+            state = state_class()
+            if state.checkAvailable(agent):
+                available.append((state, message))
+
+        self.expire(agent.game_time)
+        while True:
+            state = self.next_evaluation(agent, available)
+            if state is None:
+                break
+            fidelity = self.next_fidelity(state)
+            start = time.perf_counter()
+            if start + self.estimated_cost(fidelity) > deadline:
+                break
+            self.evaluate(agent, state, fidelity)
+            self.record_cost(fidelity, time.perf_counter() - start)
+
+        best = None
+        best_score = -np.inf
+        for state, message in available:
+            evaluation = self.evaluations.get(type(state))
+            if evaluation is not None and evaluation.score > best_score:
+                best = (state, message)
+                best_score = evaluation.score
+        if best is None:
+            best = available[0]
+        return best
+
+    def estimated_cost(self, fidelity):
+        """Gives the expected wall-clock time of a rollout at a fidelity, scaling untimed levels by their steps"""
+        if self.costs[fidelity] > 0.0:
+            return self.costs[fidelity]
+        steps = FIDELITIES[fidelity][1]
+        for timed in range(len(FIDELITIES) - 1, -1, -1):
+            if self.costs[timed] > 0.0:
+                return self.costs[timed] * steps / FIDELITIES[timed][1]
+        return STEP_COST_ESTIMATE * steps
+
+    def record_cost(self, fidelity, seconds):
+        """Updates the running average cost of rollouts at a fidelity"""
+        if self.costs[fidelity] == 0.0:
+            self.costs[fidelity] = seconds
+        else:
+            self.costs[fidelity] = 0.8 * self.costs[fidelity] + 0.2 * seconds
+
+    def expire(self, game_time):
+        """Forgets evaluations that are too old to trust"""
+        for state_class in list(self.evaluations):
+            age = game_time - self.evaluations[state_class].game_time
+            if age > self.max_age or age < 0:
+                del self.evaluations[state_class]
+
+    def next_evaluation(self, agent, available):
+        """Gives the available state that most needs a new rollout, or None if every score is at full fidelity"""
+        candidate = None
+        candidate_key = None
+        for state, message in available:
+            evaluation = self.evaluations.get(type(state))
+            if evaluation is None:
+                return state
+            current = evaluation.game_time == agent.game_time
+            if current and evaluation.fidelity == len(FIDELITIES) - 1:
+                continue
+            #prefer the least accurate, then the oldest
+            key = (evaluation.fidelity, evaluation.game_time)
+            if candidate_key is None or key < candidate_key:
+                candidate = state
+                candidate_key = key
+        return candidate
+
+    def next_fidelity(self, state):
+        """Gives the fidelity one level above the state's previous score, up to the highest level"""
+        previous = self.evaluations.get(type(state))
+        if previous is None:
+            return 0
+        return min(previous.fidelity + 1, len(FIDELITIES) - 1)
+
+    def evaluate(self, agent, state, fidelity):
+        """Scores a state with a rollout at the given fidelity"""
+        step, steps = FIDELITIES[fidelity]
+
+        ball_times, ball_locations = agent.ball_prediction
+        target = aim_path(agent, state, ball_times, ball_locations, step, steps)
+        result = simulate(agent.me, self.controls[fidelity], target, dt=step)
+        reached = result.min_distance <= REACH_DISTANCE
+        if np.any(reached):
+            travel_time = (np.min(result.min_tick[reached]) + 1) * step
+        else:
+            #not reached within the horizon, so estimate the remaining time from the closest approach
+            travel_time = steps * step + np.min(result.min_distance) / util.MAX_SPEED_CAR
+
+        score = STATE_VALUES[type(state)] - travel_time
+        if isinstance(state, Defend) and threatened(agent):
+            score += THREAT_VALUE
+        self.evaluations[type(state)] = Evaluation(score, fidelity, agent.game_time)
+
+def reactive_choice(agent):
+    """Picks the first available state in CANDIDATES without any planning.
+
+    Returns:
+        tuple: The chosen State instance and the message describing it
+
+    """
+    for state_class, message in CANDIDATES:
+        state = state_class()
+        if state.checkAvailable(agent):
+            return state, message
+
+def aim_path(agent, state, ball_times, ball_locations, step, steps):
+    """Gives the state's aim location at every rollout step.
+
+    Aim locations next to the ball follow the predicted ball path, anything else is treated as a fixed point.
+
+    Returns:
+        ndarray: locations with shape (steps, 3)
+
+    """
+    aim = state.aim_location(agent)
+    aim = np.array([aim.x, aim.y, aim.z])
+    ball = np.array([agent.ball.location.x, agent.ball.location.y, agent.ball.location.z])
+    offset = aim - ball
+    if len(ball_times) == 0 or np.linalg.norm(offset) > REACH_DISTANCE:
+        return np.repeat(aim[None, :], steps, axis=0)
+    step_times = agent.game_time + step * np.arange(1, steps + 1)
+    indices = np.clip(np.searchsorted(ball_times, step_times), 0, len(ball_times) - 1)
+    return ball_locations[indices] + offset
+
+def threatened(agent):
+    """Determines if the predicted ball path crosses the friendly goal line"""
+    blue_threat, orange_threat = agent.goal_threats
+    if agent.team == util.TEAM_BLUE:
+        return blue_threat is not None
+    return orange_threat is not None
@@ -0,0 +1,182 @@
+import cProfile
+import gc
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIRECTORY = os.path.join(SOURCE_DIRECTORY, 'profiles')
+FLUSH_EVERY = 600 #profiled ticks between writing profile files
+KEEP_FILES = 5 #profile files kept for each behavior, older files are deleted
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0 #started AllocationCounters, tracing stops when the last one stops
+
+class TickProfiler():
+    """Profiles every Nth tick with cProfile and keeps the results separately for each behavior.
+
+    Only one tick in every `every` is profiled, so the overhead on the other ticks is a single counter check. Each
+    profiled tick is merged into the statistics of the state class or maneuver that was running when it finished,
+    and every flush_every profiled ticks those statistics are written to their own file and started again. Files
+    are named after the time the profiler was created, for example FirstBot-0.AimShot.20261019-171500-0000.prof,
+    so each match adds new files instead of overwriting the last match's, and each behavior keeps only its newest
+    keep files.
+
+    Attributes:
+        every (int): Profile one tick out of this many
+        directory (str): Where profile files are written
+        name (str): Prefix for the profile files, so bots sharing a directory don't overwrite each other
+        stats (dict): Maps behavior names to the pstats.Stats collected since the last flush
+        run_stamp (str): The local time the profiler was created, part of every file name
+
+    """
+    def __init__(self, every, name, directory=PROFILE_DIRECTORY, flush_every=FLUSH_EVERY, keep=KEEP_FILES):
+        """Creates a profiler with no statistics"""
+        self.every = every
+        self.name = name
+        self.directory = directory
+        self.flush_every = flush_every
+        self.keep = keep
+        self.stats = {}
+        self.run_stamp = time.strftime('%Y%m%d-%H%M%S')
+        self._ticks = 0
+        self._profiled = 0
+        self._sequence = 0
+
+    def due(self):
+        """Counts a tick and tells whether it should be profiled"""
+        self._ticks += 1
+        return self._ticks % self.every == 0
+
+    def run(self, function, *args):
+        """Calls a function under the profiler.
+
+        Returns:
+            tuple: the function's result and the cProfile.Profile that recorded it
+
+        """
+        profile = cProfile.Profile()
+        result = profile.runcall(function, *args)
+        return result, profile
+
+    def add(self, behavior, profile):
+        """Merges a profiled tick into a behavior's statistics, writing the files when enough ticks are collected"""
+        stats = self.stats.get(behavior)
+        if stats is None:
+            self.stats[behavior] = pstats.Stats(profile)
+        else:
+            stats.add(profile)
+        self._profiled += 1
+        if self._profiled >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Writes the statistics of every behavior to a new file and removes files beyond the newest keep"""
+        if not self.stats:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for behavior, stats in self.stats.items():
+            stats.dump_stats(self.path(behavior, self._sequence))
+            prefix = f"{self.name}.{behavior}."
+            files = [os.path.join(self.directory, file) for file in os.listdir(self.directory) if file.startswith(prefix)]
+            files.sort(key=os.path.getmtime)
+            for old in files[:-self.keep]:
+                os.remove(old)
+        self.stats = {}
+        self._profiled = 0
+        self._sequence += 1
+
+    def path(self, behavior, sequence):
+        """Gives the file a behavior's statistics are written to for one flush"""
+        return os.path.join(self.directory, f"{self.name}.{behavior}.{self.run_stamp}-{sequence:04d}.prof")
+
+class AllocationCounter():
+    """Checks that the bot's own code stops allocating memory once it reaches a steady state.
+
+    tracemalloc records every block allocated from the bot's source files. Every N ticks a snapshot is compared
+    with the previous one, and the net count of new blocks is reported along with the garbage collections that ran
+    in between. CPython starts a collection when allocations outnumber frees, so a tick loop that reuses its objects
+    shows no growth and no collections. tracemalloc slows the whole bot down, so this is only for debugging.
+
+    tracemalloc traces the whole process. Counters share it and tracing only stops when the last one stops, but
+    with several bots in one process each report counts the allocations of all of them, so the check is only
+    meaningful with one bot per process.
+
+    Attributes:
+        every (int): Ticks between snapshots
+        growth (int): Net blocks allocated between the last two snapshots
+        collections (int): Garbage collections between the last two snapshots
+
+    """
+    def __init__(self, every, directory=SOURCE_DIRECTORY):
+        """Creates a stopped counter that only traces files under directory"""
+        self.every = every
+        self.growth = 0
+        self.collections = 0
+        self._filters = [tracemalloc.Filter(True, os.path.join(directory, '*'))]
+        self._ticks = 0
+        self._snapshot = None
+        self._collections = 0
+        self._started = False
+
+    def start(self):
+        """Starts tracing allocations, unless another counter already has"""
+        global _tracing_users
+        with _tracing_lock:
+            if self._started:
+                return
+            self._started = True
+            _tracing_users += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def stop(self):
+        """Stops tracing if no other counter still needs it, and forgets the last snapshot"""
+        global _tracing_users
+        with _tracing_lock:
+            if self._started:
+                self._started = False
+                _tracing_users -= 1
+                if _tracing_users == 0:
+                    tracemalloc.stop()
+        self._snapshot = None
+
+    def tick(self):
+        """Counts a tick, comparing snapshots every N ticks.
+
+        Returns:
+            str: a report of the allocations since the previous snapshot, or None if no comparison was made
+
+        """
+        self._ticks += 1
+        if self._ticks % self.every != 0:
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        collections = sum(generation['collections'] for generation in gc.get_stats())
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self.collections = collections - self._collections
+        self._collections = collections
+        if previous is None:
+            return None
+        differences = snapshot.compare_to(previous, 'lineno')
+        self.growth = sum(difference.count_diff for difference in differences)
+        report = f"{self.growth} blocks allocated and {self.collections} collections in {self.every} ticks"
+        for difference in differences[:3]:
+            if difference.count_diff > 0:
+                report += f"\n    {difference}"
+        return report
+
+def print_profiles(paths, lines=25):
+    """Combines profile files and prints the functions with the most cumulative time"""
+    stats = pstats.Stats(*paths)
+    stats.sort_stats('cumulative').print_stats(lines)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python profiling.py <profile file> [<profile file> ...]")
+    else:
+        print_profiles(sys.argv[1:])
@@ -1,11 +1,18 @@
 import math
-import time
-from rlbot.agents.base_agent import SimpleControllerState
 
 import util.util as util
-from util.vec import Vec3
 from util.orientation import relative_location
-from util.util import predict_ball_path, GOAL_HOME
+from util.util import GOAL_HOME
+from util.shots import best_shot
+from util.shotmap import SHOT_MAP
+from maneuvers import AerialShot, FlipShot, reset_controls
+
+
+"""Shot Selection"""
+MIN_SHOT_ANGLE = 0.1 #rad, the narrowest view of the goal mouth that is still worth shooting at
+
+"""Aerials"""
+MAX_AERIAL_TIME = 2.0 #s, intercepts further ahead than this are left for the ground game
 
 
 class State():
@@ -55,6 +62,20 @@ class State():
         
         """
         return False
+    
+    def aim_location(self, agent):
+        """Gives the point on the field this state is currently trying to reach.
+        
+        Used by the planner to estimate how long the state would take to accomplish its goal.
+        
+        Attributes:
+            agent (BaseAgent): the bot
+        
+        Returns:
+            Vec3: The ball's location unless overridden.
+        
+        """
+        return agent.ball.location
 
 class BallChase(State):
     """BallChase aims to drive the car straight toward the ball
@@ -96,6 +117,7 @@ class BallChase(State):
         self.checkExpire()
         
         State.execute(self, agent)
+        record_aim(agent, agent.ball.location)
         target_location = agent.ball.local_location
         
         return groundController(agent, target_location)
@@ -118,20 +140,18 @@ class Shoot(State):
             return True
         else:
             return False
+    
+    def aim_location(self, agent):
+        """The point on the ball that sends it toward the best open spot in the opponent's goal"""
+        return best_shot(agent).contact
         
     def execute(self, agent):
         """Attempts to hit the ball in a way that pushes it toward the goal"""
         self.checkExpire(agent)
         
-        team = util.sign(agent.team)
-        targetGoal = util.GOAL_HOME * -team
-        
-        ball_to_goal = targetGoal - agent.ball.location
-        #distance_to_goal = ball_to_goal.length()
-        direction_to_goal = ball_to_goal.normalized()
-        
-        aim_location = agent.ball.location - (direction_to_goal * util.BALL_RADIUS)
-        local_target = relative_location(agent.me.location, agent.me.rotation, aim_location)
+        aim_location = best_shot(agent).contact
+        record_aim(agent, aim_location)
+        local_target = relative_location(agent.me.location, agent.me.rotation, aim_location, agent.local_scratch)
         
         return groundController(agent, local_target)
     
@@ -151,27 +171,48 @@ class Defend(State):
         if util.sign(agent.ball.location.y) != util.sign(agent.team):
             self.expired = True
     
+    def aim_location(self, agent):
+        """The friendly goal while the ball is far away, otherwise the ball"""
+        if agent.ball.local_location.length() > 1500:
+            return util.GOAL_HOME * util.sign(agent.team)
+        return agent.ball.location
+    
     def execute(self, agent):
         self.checkExpired(agent)
         team = util.sign(agent.team)
-        ball_path = predict_ball_path(agent)
-        danger = False
-        for loc in ball_path:
-            if(math.fabs(loc.y) > math.fabs(util.FIELD_LENGTH / 2)):
-                danger = True
+        #the same location as aim_location, without creating a vector
+        if agent.ball.local_location.length() > 1500:
+            agent.aim_target.set(0.0, util.GOAL_HOME.y * team, 0.0)
+        else:
+            record_aim(agent, agent.ball.location)
+        blue_threat, orange_threat = agent.goal_threats
+        danger = blue_threat is not None or orange_threat is not None
         target_location = agent.ball.local_location
         if danger:
+            #clear the ball in the air if we can meet it before it reaches our goal, hitting it away from the goal
+            own_threat = blue_threat if agent.team == util.TEAM_BLUE else orange_threat
+            aerial = start_aerial(agent, 0.0, team * util.BALL_RADIUS, own_threat)
+            if aerial is not None:
+                return aerial
             #aim to hit ball to the side
             #detect of ball is east or west of bot
             east_multiplier = util.sign(agent.ball.location.x - agent.me.location.x)
             #aim for side of the ball
-            aim_location = agent.ball.location + Vec3(east_multiplier * util.BALL_RADIUS, 0, 0)
-            target_location = relative_location(agent.me.location, agent.me.rotation, aim_location)
+            ball = agent.ball.location
+            aim_location = agent.aim_scratch.set(ball.x + east_multiplier * util.BALL_RADIUS, ball.y, ball.z)
+            target_location = relative_location(agent.me.location, agent.me.rotation, aim_location,
+                                                agent.local_scratch)
         elif agent.ball.local_location.length() > 1500:
-            #get in goal
-            target_location = relative_location(agent.me.location, agent.me.rotation, util.GOAL_HOME * team)
+            #get in goal, picking up boost on the way if we are low
+            goal_location = agent.aim_scratch.set(0.0, util.GOAL_HOME.y * team, 0.0)
+            if agent.me.boost < 50:
+                pads = agent.boost_pads.along_path(agent.me.location, goal_location, 500, agent.game_time)
+                if len(pads) > 0:
+                    goal_location = agent.boost_pads.location(pads[0])
+            target_location = relative_location(agent.me.location, agent.me.rotation, goal_location,
+                                                agent.local_scratch)
         elif agent.ball.local_location.length() < 500:
-            return shotController(agent, util.GOAL_HOME * -team)
+            return shotController(agent, best_shot(agent).target)
         return groundController(agent, target_location)
     
 class AimShot(State):
@@ -181,13 +222,16 @@ class AimShot(State):
         super().__init__()
         
     def checkAvailable(self, agent):
-        """If the ball is between the car and the goal, it is possible to shoot"""
-        ballDirection = agent.ball.local_location
-        goal_location = relative_location(agent.me.location, agent.me.rotation, util.GOAL_HOME*-util.sign(agent.team))
-        angle = ballDirection.ang_to(goal_location)
-        if angle < (math.pi / 2):
-            return True
-        return False
+        """If enough of the goal is open from the ball and the car is behind the ball, it is possible to shoot
+        
+        The shot geometry is looked up from the precomputed shot map rather than worked out every tick.
+        """
+        ball = agent.ball.location
+        open_angle, aim_x, heading_x, heading_y = SHOT_MAP.sample(ball.x, ball.y, agent.team)
+        if open_angle < MIN_SHOT_ANGLE:
+            return False
+        #the car is behind the ball when it is approaching along the shot heading
+        return (ball.x - agent.me.location.x) * heading_x + (ball.y - agent.me.location.y) * heading_y > 0
     
     def checkExpired(self, agent, team):
         """If the ball is not reasonably close to being between the car and the goal, the state expires"""
@@ -198,24 +242,75 @@ class AimShot(State):
             return False
         return True
     
+    def aim_location(self, agent):
+        """The point on the ball that sends it toward the best open spot in the opponent's goal"""
+        return Shoot.aim_location(self, agent)
+    
     def execute(self, agent):
         team = util.sign(agent.team)
         self.expired = self.checkExpired(agent, team)
         
-        return shotController(agent, util.GOAL_HOME*team*-1)
+        #take the shot in the air if the ball can be reached there, hitting it along the shot heading
+        earliest = agent.aerial.earliest
+        if earliest is not None:
+            intercept = agent.ball_prediction[1][earliest]
+            _, _, heading_x, heading_y = SHOT_MAP.sample(float(intercept[0]), float(intercept[1]), agent.team)
+            aerial = start_aerial(agent, -heading_x * util.BALL_RADIUS, -heading_y * util.BALL_RADIUS)
+            if aerial is not None:
+                return aerial
+        
+        shot = best_shot(agent)
+        record_aim(agent, shot.contact)
+        return shotController(agent, shot.target)
+    
+def record_aim(agent, location):
+    """Copies the location a state aims for this tick into agent.aim_target, for telemetry to publish"""
+    agent.aim_target.set(location.x, location.y, location.z)
+    
+def start_aerial(agent, offset_x, offset_y, before=None):
+    """Starts an AerialShot toward the earliest ball slice the car can reach in the air
+    
+    The aerial is only started from the ground, since the feasibility check assumes the car jumps this tick.
+    
+    Attributes:
+        offset_x (float): Added to the intercept's x, to choose the side of the ball that is hit
+        offset_y (float): Added to the intercept's y
+        before (int): Only intercepts at earlier slices than this are used, or None for no limit
+        
+    Returns:
+        SimpleControllerState: the commands for the aerial's first tick, or None if no aerial was started
+    """
+    earliest = agent.aerial.earliest
+    if earliest is None or not agent.me.on_ground or (before is not None and earliest >= before):
+        return None
+    times, locations = agent.ball_prediction
+    arrival_time = float(times[earliest])
+    if arrival_time - agent.game_time > MAX_AERIAL_TIME:
+        return None
+    if not agent.maneuvers.cooldown_elapsed(AerialShot.name, agent.game_time, AerialShot.cooldown):
+        return None
+    intercept = locations[earliest]
+    target = agent.aim_scratch.set(float(intercept[0]) + offset_x, float(intercept[1]) + offset_y,
+                                   float(intercept[2]))
+    if agent.maneuvers.request(AerialShot(target, arrival_time, agent.game_time), agent.game_time,
+                               AerialShot.cooldown):
+        return agent.maneuvers.execute(agent)
+    return None
     
 def groundController(agent, target_location):
     """Gives a set of commands to move the car along the ground toward a target location
     
+    The commands are written into the agent's reusable controller_state, so the controller allocates nothing.
+    
     Attributes:
         target_location (Vec3): The local location the car wants to aim for
         
     Returns:
         SimpleControllerState: the set of commands to achieve the goal
     """
-    controllerState = SimpleControllerState()
+    controllerState = reset_controls(agent.controller_state)
     ball_direction = target_location;
-    distance = target_location.flat().length()
+    distance = math.hypot(target_location.x, target_location.y)
     
     angle = -math.atan2(ball_direction.y,ball_direction.x)
 
@@ -273,7 +368,10 @@ def shotController(agent, shotTarget):
     """Gives a set of commands to make the car shoot the ball
     
     This function will flip the car into the ball in order to make a shot and
-    it will adjust the car's speed and positioning to help make the shot.
+    it will adjust the car's speed and positioning to help make the shot. The flip itself is run as a
+    FlipShot maneuver, which takes over the car until it lands the flip.
+    
+    Like groundController, this writes into the agent's reusable controller_state and its scratch vectors.
     
     Attributes:
         shotTarget (Vec3): The position that we want to hit the ball toward
@@ -281,19 +379,9 @@ def shotController(agent, shotTarget):
     Returns:
         SimpleControllerState: the set of commands to achieve the goal
     """
-    controllerState = SimpleControllerState()
-    #get ball distance and angle from car
+    #get ball distance from car
     ball_direction = agent.ball.local_location
-    ball_distance = agent.ball.local_location.flat().length()
-    ball_angle = -math.atan2(ball_direction.y,ball_direction.x)
-    if ball_angle > math.pi:
-        ball_angle -= 2*math.pi
-    elif ball_angle < -math.pi:
-        ball_angle += 2*math.pi
-    #get target distance and angle from ball
-    ball_to_target = shotTarget - agent.ball.location
-    target_distance = ball_to_target.length()
-    ball_to_target_unit = ball_to_target.normalized()
+    ball_distance = math.hypot(ball_direction.x, ball_direction.y)
     if(ball_distance < 400):
         flipReady = True
     else:
@@ -301,40 +389,19 @@ def shotController(agent, shotTarget):
     
     #flipping
     if(flipReady):
-        time_diff = time.time() - agent.timer1
-        if time_diff > 2.2:
-            agent.timer1 = time.time()
-        elif time_diff <= 0.1:
-            #jump and turn toward the ball
-            controllerState.jump = True
-            if ball_angle > 0:
-                controllerState.yaw = -1
-            elif ball_angle < 0:
-                controllerState.yaw = 1
-        elif time_diff >= 0.1 and time_diff <= 0.15:
-            #keep turning
-            controllerState.jump = False
-            if ball_angle > 0:
-                controllerState.yaw = -1
-            elif ball_angle < 0:
-                controllerState.yaw = 1
-        elif time_diff > 0.15 and time_diff < 1:
-            #flip
-            controllerState.jump = True
-            if ball_angle > 0:
-                controllerState.yaw = -1
-            elif ball_angle < 0:
-                controllerState.yaw = 1
-            if math.fabs(ball_angle) > math.pi:
-                controllerState.pitch = 1
-            else:
-                controllerState.pitch = -1
-        else:
-            flipReady = False
-            controllerState.jump = False
-    else:
-        aim_location = agent.ball.location - (ball_to_target_unit * util.BALL_RADIUS)
-        local_target = relative_location(agent.me.location, agent.me.rotation, aim_location)
-        controllerState = groundController(agent, local_target)
+        if agent.maneuvers.request(FlipShot(), agent.game_time, FlipShot.cooldown):
+            return agent.maneuvers.execute(agent)
+        return reset_controls(agent.controller_state)
     
-    return controllerState
\ No newline at end of file
+    #get the direction from the ball to the target
+    ball = agent.ball.location
+    to_target_x = shotTarget.x - ball.x
+    to_target_y = shotTarget.y - ball.y
+    to_target_z = shotTarget.z - ball.z
+    target_distance = math.sqrt(to_target_x**2 + to_target_y**2 + to_target_z**2)
+    #aim for the side of the ball facing away from the target
+    offset = util.BALL_RADIUS / target_distance
+    aim_location = agent.aim_scratch.set(ball.x - to_target_x * offset, ball.y - to_target_y * offset,
+                                         ball.z - to_target_z * offset)
+    local_target = relative_location(agent.me.location, agent.me.rotation, aim_location, agent.local_scratch)
+    return groundController(agent, local_target)
\ No newline at end of file
@@ -0,0 +1,159 @@
+import collections
+import socket
+import struct
+import sys
+import threading
+
+"""Telemetry frames are fixed-size little-endian records, one per tick"""
+FRAME_VERSION = 1
+FRAME = struct.Struct(
+    '<HBBif'   #version, bot index, team, frame number, game time
+    '16s'      #state name, utf-8 padded with zeros
+    '4f'       #phase timings in ms: preprocess, decide, render, total
+    '3f'       #chosen target location
+    '5fB'      #throttle, steer, pitch, yaw, roll, button flags
+    '6f'       #ball location, ball velocity
+    '9ff'      #car location, car velocity, car rotation (pitch, yaw, roll), boost
+)
+FLAG_JUMP = 1
+FLAG_BOOST = 2
+FLAG_HANDBRAKE = 4
+
+DEFAULT_HOST = '127.0.0.1'
+QUEUE_SIZE = 256 #frames kept while the receiver falls behind, older frames are dropped first
+
+def pack_frame(agent, state_name, timings, target, controller_state):
+    """Packs one tick of telemetry.
+
+    Args:
+        agent (MyBot): The bot
+        state_name (str): The name of the active maneuver or state
+        timings (tuple): Milliseconds spent in preprocess, deciding, rendering, and in total
+        target (Vec3): The location the bot is trying to reach
+        controller_state (SimpleControllerState): The commands sent this tick
+
+    Returns:
+        bytes: the frame
+
+    """
+    flags = ((FLAG_JUMP if controller_state.jump else 0) | (FLAG_BOOST if controller_state.boost else 0)
+             | (FLAG_HANDBRAKE if controller_state.handbrake else 0))
+    me = agent.me
+    ball = agent.ball
+    return FRAME.pack(FRAME_VERSION, agent.index, agent.team, agent.frame_num, agent.game_time,
+                      state_name.encode('utf-8')[:16],
+                      *timings,
+                      target.x, target.y, target.z,
+                      controller_state.throttle, controller_state.steer, controller_state.pitch,
+                      controller_state.yaw, controller_state.roll, flags,
+                      ball.location.x, ball.location.y, ball.location.z,
+                      ball.velocity.x, ball.velocity.y, ball.velocity.z,
+                      me.location.x, me.location.y, me.location.z,
+                      me.velocity.x, me.velocity.y, me.velocity.z,
+                      me.rotation.pitch, me.rotation.yaw, me.rotation.roll, me.boost)
+
+def unpack_frame(data, offset=0):
+    """Unpacks a frame into a dictionary of named fields"""
+    values = FRAME.unpack_from(data, offset)
+    return {
+        'version': values[0],
+        'index': values[1],
+        'team': values[2],
+        'frame_num': values[3],
+        'game_time': values[4],
+        'state': values[5].rstrip(b'\0').decode('utf-8'),
+        'timings': values[6:10],
+        'target': values[10:13],
+        'controls': values[13:18],
+        'jump': bool(values[18] & FLAG_JUMP),
+        'boost_pressed': bool(values[18] & FLAG_BOOST),
+        'handbrake': bool(values[18] & FLAG_HANDBRAKE),
+        'ball_location': values[19:22],
+        'ball_velocity': values[22:25],
+        'car_location': values[25:28],
+        'car_velocity': values[28:31],
+        'car_rotation': values[31:34],
+        'car_boost': values[34],
+    }
+
+def read_frames(path):
+    """Reads every frame from a file written by the receiver"""
+    with open(path, 'rb') as log:
+        data = log.read()
+    return [unpack_frame(data, offset) for offset in range(0, len(data) - FRAME.size + 1, FRAME.size)]
+
+class TelemetryPublisher(threading.Thread):
+    """Sends telemetry frames over local UDP without ever blocking the tick loop.
+
+    publish only appends to a bounded queue, which drops its oldest frame when full. A background thread sends
+    the queued frames through a non-blocking socket, so a slow or missing receiver costs nothing but dropped frames.
+
+    Attributes:
+        address (tuple): The host and port frames are sent to
+        queue_drops (int): Frames discarded because the queue was full, only changed by the tick thread
+        send_failures (int): Frames the socket failed to send, only changed by the sending thread
+
+    """
+    def __init__(self, port, host=DEFAULT_HOST, queue_size=QUEUE_SIZE):
+        """Creates a stopped publisher"""
+        super().__init__(name="TelemetryPublisher", daemon=True)
+        self.address = (host, port)
+        self.queue_drops = 0
+        self.send_failures = 0
+        self._queue = collections.deque(maxlen=queue_size)
+        self._wake = threading.Event()
+        self._running = True
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    @property
+    def dropped(self):
+        """Frames discarded because the queue was full or the socket would have blocked"""
+        return self.queue_drops + self.send_failures
+
+    def publish(self, frame):
+        """Queues a frame for sending"""
+        if len(self._queue) == self._queue.maxlen:
+            self.queue_drops += 1
+        self._queue.append(frame)
+        self._wake.set()
+
+    def stop(self):
+        """Asks the sending thread to finish"""
+        self._running = False
+        self._wake.set()
+
+    def run(self):
+        """Sends queued frames until stopped"""
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            while self._queue:
+                frame = self._queue.popleft()
+                try:
+                    self._socket.sendto(frame, self.address)
+                except OSError:
+                    #nobody is listening or the socket buffer is full
+                    self.send_failures += 1
+        self._socket.close()
+
+def receive(path, port, host=DEFAULT_HOST):
+    """Listens for telemetry frames and appends them to a file until interrupted"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind((host, port))
+    print(f"Writing telemetry from {host}:{port} to {path}")
+    with open(path, 'ab') as log:
+        try:
+            while True:
+                frame = listener.recv(FRAME.size)
+                if len(frame) == FRAME.size:
+                    log.write(frame)
+        except KeyboardInterrupt:
+            pass
+    listener.close()
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python telemetry.py <output file> <port>")
+    else:
+        receive(sys.argv[1], int(sys.argv[2]))
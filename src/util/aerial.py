@@ -0,0 +1,79 @@
+import numpy as np
+
+from util.util import (ACCELERATION_BOOST, ACCELERATION_GRAVITY, BOOST_CONSUMPTION_RATE, JUMP_MAX_DURATION,
+                       JUMP_VELOCITY, JUMP_VELOCITY_ACCELERATION)
+
+"""Aerial Constants"""
+AERIAL_TURN_RATE = 3.0 #rad/s, a conservative average rate the car can reorient at in the air
+MIN_AERIAL_HEIGHT = 300 #uu, balls lower than this are hit from the ground
+
+class AerialResult():
+    """The aerial options against every slice of the ball prediction.
+
+    Attributes:
+        feasible (ndarray): True for slices the car can reach in the air
+        boost_required (ndarray): Boost needed to reach each slice
+        earliest (int): Index of the first feasible slice, or None if no slice is feasible
+
+    """
+    def __init__(self, feasible, boost_required, earliest):
+        """Creates a new AerialResult"""
+        self.feasible = feasible
+        self.boost_required = boost_required
+        self.earliest = earliest
+
+def jump_displacement(t):
+    """Vectorized height gained from a full jump after t seconds, on top of the car's own motion and gravity"""
+    hold = JUMP_MAX_DURATION / 1000
+    held = np.minimum(t, hold)
+    return JUMP_VELOCITY * t + JUMP_VELOCITY_ACCELERATION * held * (t - held / 2)
+
+def aerial_reachability(car, times, locations, game_time):
+    """Checks every ball prediction slice at once for whether the car can reach it in the air.
+
+    The car is assumed to jump straight up (if it is on the ground), turn toward the required direction at
+    AERIAL_TURN_RATE and then boost with a constant acceleration for the rest of the time. A slice is feasible when
+    the required acceleration is within ACCELERATION_BOOST and the boost it consumes is no more than the car has.
+
+    Args:
+        car (Car): the car, using location, velocity, rotation, boost and on_ground
+        times (ndarray): game time of each slice, shape (n,)
+        locations (ndarray): ball location of each slice, shape (n, 3)
+        game_time (float): the current game time
+
+    Returns:
+        AerialResult: feasibility, required boost and the earliest feasible slice
+
+    """
+    t = times - game_time
+    if len(t) == 0:
+        return AerialResult(np.zeros(0, dtype=bool), np.zeros(0), None)
+    t = np.maximum(t, 1e-3)
+
+    location = np.array(car.location.to_triple())
+    velocity = np.array(car.velocity.to_triple())
+    up = np.array(car.rotation.up.to_triple())
+    forward = np.array(car.rotation.forward.to_triple())
+
+    #where the car would be with no boost, shape (n, 3)
+    ballistic = location + velocity * t[:, None]
+    ballistic[:, 2] -= 0.5 * ACCELERATION_GRAVITY * t**2
+    if car.on_ground:
+        ballistic += up * jump_displacement(t)[:, None]
+
+    #the rest has to come from boosting after the car has turned toward it
+    delta = locations - ballistic
+    distance = np.linalg.norm(delta, axis=1)
+    direction = delta / np.maximum(distance, 1e-6)[:, None]
+    turn_angle = np.arccos(np.clip(direction @ forward, -1.0, 1.0))
+    boost_time = t - turn_angle / AERIAL_TURN_RATE
+    boost_time_safe = np.maximum(boost_time, 1e-3)
+
+    acceleration = 2 * distance / boost_time_safe**2
+    boost_required = BOOST_CONSUMPTION_RATE * boost_time_safe * np.minimum(acceleration / ACCELERATION_BOOST, 1.0)
+    feasible = ((boost_time > 0) & (acceleration <= ACCELERATION_BOOST) & (boost_required <= car.boost)
+                & (locations[:, 2] >= MIN_AERIAL_HEIGHT))
+
+    indices = np.nonzero(feasible)[0]
+    earliest = int(indices[0]) if len(indices) > 0 else None
+    return AerialResult(feasible, boost_required, earliest)
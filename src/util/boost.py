@@ -0,0 +1,128 @@
+import numpy as np
+
+from util.vec import Vec3
+from util.util import BOOST_AMOUNT_LARGE, BOOST_AMOUNT_SMALL, BOOST_RESPAWN_LARGE, BOOST_RESPAWN_SMALL, MAX_SPEED_CAR
+
+"""Boost pad locations on the standard soccar field, in the same order as GameTickPacket.game_boosts"""
+BOOST_PADS = np.array([
+    (0.0, -4240.0, 70.0),
+    (-1792.0, -4184.0, 70.0),
+    (1792.0, -4184.0, 70.0),
+    (-3072.0, -4096.0, 73.0),
+    (3072.0, -4096.0, 73.0),
+    (-940.0, -3308.0, 70.0),
+    (940.0, -3308.0, 70.0),
+    (0.0, -2816.0, 70.0),
+    (-3584.0, -2484.0, 70.0),
+    (3584.0, -2484.0, 70.0),
+    (-1788.0, -2300.0, 70.0),
+    (1788.0, -2300.0, 70.0),
+    (-2048.0, -1036.0, 70.0),
+    (0.0, -1024.0, 70.0),
+    (2048.0, -1036.0, 70.0),
+    (-3584.0, 0.0, 73.0),
+    (-1024.0, 0.0, 70.0),
+    (1024.0, 0.0, 70.0),
+    (3584.0, 0.0, 73.0),
+    (-2048.0, 1036.0, 70.0),
+    (0.0, 1024.0, 70.0),
+    (2048.0, 1036.0, 70.0),
+    (-1788.0, 2300.0, 70.0),
+    (1788.0, 2300.0, 70.0),
+    (-3584.0, 2484.0, 70.0),
+    (3584.0, 2484.0, 70.0),
+    (0.0, 2816.0, 70.0),
+    (-940.0, 3310.0, 70.0),
+    (940.0, 3308.0, 70.0),
+    (-3072.0, 4096.0, 73.0),
+    (3072.0, 4096.0, 73.0),
+    (-1792.0, 4184.0, 70.0),
+    (1792.0, 4184.0, 70.0),
+    (0.0, 4240.0, 70.0),
+])
+LARGE_PADS = np.zeros(len(BOOST_PADS), dtype=bool)
+LARGE_PADS[[3, 4, 15, 18, 29, 30]] = True
+
+class BoostPadTracker():
+    """Keeps track of which boost pads are available and answers vectorized queries about them.
+
+    The pad locations never change, so they are held as one static array and every query measures all of them at
+    once. Respawn times come from each pad's timer in the packet, the seconds since it was picked up, which lets
+    queries count a pad as available if it will have respawned by the time the car gets there.
+
+    Attributes:
+        locations (ndarray): Pad locations with shape (34, 3)
+        large (ndarray): True for the 100 boost pads
+        amount (ndarray): Boost given by each pad
+        respawn (ndarray): Seconds each pad takes to respawn
+        active (ndarray): True for pads that can currently be picked up
+        available_at (ndarray): Game time each pad becomes active again, or 0 while it is active
+
+    """
+    def __init__(self):
+        """Creates a tracker where every pad is active"""
+        self.locations = BOOST_PADS
+        self.large = LARGE_PADS
+        self.amount = np.where(LARGE_PADS, BOOST_AMOUNT_LARGE, BOOST_AMOUNT_SMALL)
+        self.respawn = np.where(LARGE_PADS, BOOST_RESPAWN_LARGE, BOOST_RESPAWN_SMALL)
+        self.active = np.ones(len(BOOST_PADS), dtype=bool)
+        self.available_at = np.zeros(len(BOOST_PADS))
+
+    def update(self, gamePacket, game_time):
+        """Reads the pad states from the packet and records when inactive pads will respawn"""
+        count = min(gamePacket.num_boost, len(self.locations))
+        pads = gamePacket.game_boosts
+        active = np.array([pads[i].is_active for i in range(count)], dtype=bool)
+        timers = np.array([pads[i].timer for i in range(count)])
+        self.available_at[:count] = np.where(active, 0.0, game_time + self.respawn[:count] - timers)
+        self.active[:count] = active
+
+    def available(self, arrival_times):
+        """Determines which pads will be active by the given game times, one time per pad"""
+        return self.active | (self.available_at <= arrival_times)
+
+    def nearest(self, location: Vec3, game_time, speed=MAX_SPEED_CAR, large_only=False):
+        """Finds the closest pad that will be active by the time the car can reach it.
+
+        Args:
+            location (Vec3): where the car is
+            game_time (float): the current game time
+            speed (float): the speed used to estimate arrival times
+            large_only (bool): only consider the 100 boost pads
+
+        Returns:
+            int: the index of the pad, or None if no pad qualifies
+
+        """
+        distance = np.linalg.norm(self.locations - location.to_triple(), axis=1)
+        usable = self.available(game_time + distance / speed)
+        if large_only:
+            usable = usable & self.large
+        if not np.any(usable):
+            return None
+        return int(np.argmin(np.where(usable, distance, np.inf)))
+
+    def along_path(self, start: Vec3, end: Vec3, detour, game_time, speed=MAX_SPEED_CAR):
+        """Finds the pads that can be collected on the way from start to end.
+
+        Args:
+            start (Vec3): where the path begins
+            end (Vec3): where the path ends
+            detour (float): the most extra distance in uu the car may drive to collect a pad
+            game_time (float): the current game time
+            speed (float): the speed used to estimate arrival times
+
+        Returns:
+            ndarray: indices of the qualifying pads, ordered from the shortest detour to the longest
+
+        """
+        to_pad = np.linalg.norm(self.locations - start.to_triple(), axis=1)
+        from_pad = np.linalg.norm(self.locations - end.to_triple(), axis=1)
+        extra = to_pad + from_pad - start.dist(end)
+        usable = (extra <= detour) & self.available(game_time + to_pad / speed)
+        indices = np.nonzero(usable)[0]
+        return indices[np.argsort(extra[indices])]
+
+    def location(self, index):
+        """Gives the location of a pad as a Vec3"""
+        return Vec3(*self.locations[index])
@@ -0,0 +1,63 @@
+import collections
+import threading
+
+import numpy as np
+
+"""How many distinct frames are kept at once, so bots that are a frame apart don't evict each other's results"""
+FRAMES_KEPT = 2
+
+class FrameCache():
+    """A process-wide cache of analysis results that only depend on the game frame.
+
+    Every bot in the process asks the cache for ball-only results such as the ball prediction arrays. The first
+    bot to ask on a new frame computes the result and every other bot receives the same object. Results are made
+    read-only so one bot can not change what another sees, and whole frames are evicted as newer frames arrive.
+
+    All access goes through one lock. Computing a value while holding it means the other bots wait for the result
+    instead of computing it again.
+
+    """
+    def __init__(self, frames_kept=FRAMES_KEPT):
+        """Creates an empty cache"""
+        self.frames_kept = frames_kept
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, frame, name, compute):
+        """Gives the named result for a frame, computing it if no bot has yet.
+
+        Args:
+            frame (int): the game frame the result belongs to
+            name (str): the name of the result
+            compute (function): called with no arguments to create the result if it is missing
+
+        Returns:
+            The shared, read-only result
+
+        """
+        with self._lock:
+            values = self._frames.get(frame)
+            if values is None:
+                values = {}
+                self._frames[frame] = values
+                while len(self._frames) > self.frames_kept:
+                    self._frames.popitem(last=False)
+            if name not in values:
+                values[name] = read_only(compute())
+            return values[name]
+
+    def clear(self):
+        """Forgets every result"""
+        with self._lock:
+            self._frames.clear()
+
+def read_only(value):
+    """Marks numpy arrays, including those inside tuples and lists, as read-only"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            read_only(item)
+    return value
+
+SHARED_CACHE = FrameCache()
@@ -0,0 +1,231 @@
+import math
+
+import numpy as np
+
+from util.util import (ACCELERATION_BOOST, ACCELERATION_BRAKE, ACCELERATION_COAST, ACCELERATION_GRAVITY,
+                       ACCELERATION_THROTTLE, BOOST_CONSUMPTION_RATE, CAR_REST_HEIGHT, FULL_SPEED_CAR,
+                       JUMP_MAX_DURATION, JUMP_VELOCITY, JUMP_VELOCITY_ACCELERATION, MAX_SPEED_CAR,
+                       turn_radius_helper)
+
+"""Simplified car dynamics for predicting the result of many control sequences at once.
+
+The model treats the car as a point that drives along its heading on a flat floor. It accounts for throttle,
+braking, coasting, boosting, steering and a single jump, which is enough to compare candidate inputs against each
+other. Walls, the ceiling, air control and collisions are not modeled.
+"""
+
+TICK = 1 / 60 #s
+
+#speeds at which turn_radius_helper changes slope, used to build a vectorized curvature lookup
+CURVATURE_SPEEDS = np.array([0.0, 500.0, 1000.0, 1500.0, 1750.0, MAX_SPEED_CAR])
+CURVATURE_VALUES = np.array([turn_radius_helper(v) for v in CURVATURE_SPEEDS])
+
+THROTTLE_SPEEDS = np.array([0.0, FULL_SPEED_CAR, FULL_SPEED_CAR + 10])
+THROTTLE_VALUES = np.array([ACCELERATION_THROTTLE, 160.0, 0.0])
+
+def curvature(speed):
+    """Vectorized inverse of turn_radius. Accepts an array of speeds and returns the curvature in 1/uu."""
+    return np.interp(np.abs(speed), CURVATURE_SPEEDS, CURVATURE_VALUES)
+
+def throttle_acceleration(speed):
+    """Vectorized acceleration from full throttle at a given speed, ignoring boost"""
+    return np.interp(np.abs(speed), THROTTLE_SPEEDS, THROTTLE_VALUES)
+
+class Controls():
+    """A batch of control sequences stored as arrays of shape (candidates, ticks).
+
+    Attributes:
+        throttle (ndarray): Throttle between -1 and 1
+        steer (ndarray): Steering between -1 and 1
+        boost (ndarray): True where boost is held
+        jump (ndarray): True where jump is held
+
+    """
+    def __init__(self, throttle, steer, boost=None, jump=None):
+        """Creates a batch of control sequences. Missing boost and jump inputs default to never pressed."""
+        self.throttle = np.asarray(throttle, dtype=float)
+        self.steer = np.asarray(steer, dtype=float)
+        shape = self.throttle.shape
+        self.boost = np.zeros(shape, dtype=bool) if boost is None else np.asarray(boost, dtype=bool)
+        self.jump = np.zeros(shape, dtype=bool) if jump is None else np.asarray(jump, dtype=bool)
+
+    @property
+    def candidates(self):
+        """The number of control sequences in the batch"""
+        return self.throttle.shape[0]
+
+    @property
+    def ticks(self):
+        """The length of each control sequence in ticks"""
+        return self.throttle.shape[1]
+
+    @classmethod
+    def constant(cls, throttle, steer, boost, ticks):
+        """Creates sequences that hold the same inputs for every tick.
+
+        Args:
+            throttle, steer, boost: 1-D arrays with one value per candidate
+            ticks (int): the length of the sequences
+
+        """
+        def hold(values):
+            return np.repeat(np.asarray(values)[:, None], ticks, axis=1)
+        return cls(hold(throttle), hold(steer), hold(boost))
+
+    @classmethod
+    def from_controller_states(cls, sequences):
+        """Creates a batch from lists of SimpleControllerStates of equal length"""
+        throttle = [[s.throttle for s in sequence] for sequence in sequences]
+        steer = [[s.steer for s in sequence] for sequence in sequences]
+        boost = [[s.boost for s in sequence] for sequence in sequences]
+        jump = [[s.jump for s in sequence] for sequence in sequences]
+        return cls(throttle, steer, boost, jump)
+
+def candidate_controls(ticks, steer_values=(-1.0, -0.5, 0.0, 0.5, 1.0), throttle_values=(1.0, 0.0, -1.0)):
+    """Creates every combination of constant steering, throttle and boost.
+
+    Boost is only paired with full throttle, since boosting overrides the throttle anyway.
+
+    Returns:
+        Controls: the batch of candidate sequences
+
+    """
+    throttle = []
+    steer = []
+    boost = []
+    for s in steer_values:
+        for t in throttle_values:
+            throttle.append(t)
+            steer.append(s)
+            boost.append(False)
+        throttle.append(1.0)
+        steer.append(s)
+        boost.append(True)
+    return Controls.constant(throttle, steer, boost, ticks)
+
+class RolloutResult():
+    """The outcome of simulating a batch of control sequences.
+
+    All attributes have one entry per candidate.
+
+    Attributes:
+        location (ndarray): Final locations, shape (candidates, 3)
+        speed (ndarray): Final signed speed along the car's heading
+        yaw (ndarray): Final yaw in radians
+        vertical_velocity (ndarray): Final vertical velocity
+        boost (ndarray): Boost remaining
+        min_distance (ndarray): Closest distance reached to the target, or None without a target
+        min_tick (ndarray): Tick index at which min_distance was reached, or None without a target
+
+    """
+    def __init__(self, location, speed, yaw, vertical_velocity, boost, min_distance, min_tick):
+        """Creates a new RolloutResult"""
+        self.location = location
+        self.speed = speed
+        self.yaw = yaw
+        self.vertical_velocity = vertical_velocity
+        self.boost = boost
+        self.min_distance = min_distance
+        self.min_tick = min_tick
+
+    def best(self):
+        """Returns the index of the candidate that got closest to the target"""
+        return int(np.argmin(self.min_distance))
+
+def car_start(car):
+    """Extracts the simulation start values from a Car GameObject.
+
+    Returns:
+        tuple: location (ndarray), signed forward speed, yaw, vertical velocity, boost
+
+    """
+    yaw = car.rotation.yaw
+    speed = car.velocity.x * math.cos(yaw) + car.velocity.y * math.sin(yaw)
+    location = np.array([car.location.x, car.location.y, car.location.z])
+    return location, speed, yaw, car.velocity.z, car.boost
+
+def simulate(car, controls, target=None, dt=TICK):
+    """Simulates every control sequence in a batch from the same starting car.
+
+    Args:
+        car (Car): the car to start from. Uses location, velocity, rotation and boost.
+        controls (Controls): the candidate sequences
+        target (ndarray): optional point of shape (3,) or moving target of shape (ticks, 3), such as a predicted ball
+            path, that the distance is measured to every tick
+        dt (float): seconds per tick. A coarser step with shorter sequences keeps long horizons within a tick budget.
+
+    Returns:
+        RolloutResult: the end state of every candidate
+
+    """
+    n = controls.candidates
+    start_location, start_speed, start_yaw, start_vz, start_boost = car_start(car)
+
+    x = np.full(n, start_location[0])
+    y = np.full(n, start_location[1])
+    z = np.full(n, start_location[2])
+    speed = np.full(n, start_speed)
+    yaw = np.full(n, start_yaw)
+    vz = np.full(n, start_vz)
+    boost = np.full(n, float(start_boost))
+    on_ground = np.full(n, start_location[2] <= CAR_REST_HEIGHT + 1)
+    jumped = ~on_ground
+    jump_timer = np.full(n, JUMP_MAX_DURATION / 1000)
+
+    if target is not None:
+        target = np.asarray(target, dtype=float)
+        moving = target.ndim == 2
+        min_distance = np.full(n, np.inf)
+        min_tick = np.zeros(n, dtype=int)
+
+    for t in range(controls.ticks):
+        throttle = controls.throttle[:, t]
+        boosting = controls.boost[:, t] & (boost > 0)
+
+        #longitudinal acceleration while on the ground
+        full_throttle = throttle_acceleration(speed)
+        accel = throttle * full_throttle
+        accel = np.where((throttle * speed) < 0, -ACCELERATION_BRAKE * np.sign(throttle), accel)
+        coast = np.sign(speed) * np.maximum(ACCELERATION_COAST, -np.abs(speed) / dt)
+        accel = np.where((throttle == 0) & ~boosting, coast, accel)
+        accel = np.where(boosting, full_throttle + ACCELERATION_BOOST, accel)
+        accel = np.where(on_ground, accel, boosting * ACCELERATION_BOOST)
+        speed = np.clip(speed + accel * dt, -MAX_SPEED_CAR, MAX_SPEED_CAR)
+        boost = np.maximum(boost - boosting * BOOST_CONSUMPTION_RATE * dt, 0.0)
+
+        #steering only turns the car while the wheels are on the ground
+        yaw = yaw + np.where(on_ground, controls.steer[:, t] * curvature(speed) * speed * dt, 0.0)
+
+        #jumping
+        jump = controls.jump[:, t]
+        takeoff = jump & on_ground & ~jumped
+        vz = np.where(takeoff, vz + JUMP_VELOCITY, vz)
+        jump_timer = np.where(takeoff, 0.0, jump_timer)
+        jumped = jumped | takeoff
+        on_ground = on_ground & ~takeoff
+        holding = jump & ~on_ground & (jump_timer < JUMP_MAX_DURATION / 1000)
+        vz = vz + holding * JUMP_VELOCITY_ACCELERATION * dt
+        jump_timer = jump_timer + dt
+        vz = np.where(on_ground, 0.0, vz - ACCELERATION_GRAVITY * dt)
+
+        x = x + speed * np.cos(yaw) * dt
+        y = y + speed * np.sin(yaw) * dt
+        z = z + vz * dt
+
+        landed = ~on_ground & (z <= CAR_REST_HEIGHT) & (vz <= 0)
+        z = np.where(landed, CAR_REST_HEIGHT, z)
+        vz = np.where(landed, 0.0, vz)
+        on_ground = on_ground | landed
+        jumped = jumped & ~landed
+
+        if target is not None:
+            goal = target[min(t, len(target) - 1)] if moving else target
+            distance = np.sqrt((x - goal[0])**2 + (y - goal[1])**2 + (z - goal[2])**2)
+            closer = distance < min_distance
+            min_distance = np.where(closer, distance, min_distance)
+            min_tick = np.where(closer, t, min_tick)
+
+    location = np.stack((x, y, z), axis=1)
+    if target is None:
+        return RolloutResult(location, speed, yaw, vz, boost, None, None)
+    return RolloutResult(location, speed, yaw, vz, boost, min_distance, min_tick)
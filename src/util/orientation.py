@@ -40,7 +40,7 @@ class Orientation:
 # This function lets you make any location the center of the world.
 # For example, set center to your car's location and ori to your car's orientation, then the target will be
 # relative to your car!
-def relative_location(center: Vec3, ori: Orientation, target: Vec3) -> Vec3:
+def relative_location(center: Vec3, ori: Orientation, target: Vec3, out: Vec3 = None) -> Vec3:
     """
     Returns target as a relative location from center's point of view, using the given orientation. The components of
     the returned vector describes:
@@ -48,8 +48,18 @@ def relative_location(center: Vec3, ori: Orientation, target: Vec3) -> Vec3:
     * x: how far in front
     * y: how far right
     * z: how far above
+
+    If out is given the result is written into it instead of a new vector.
     """
-    x = (target - center).dot(ori.forward)
-    y = (target - center).dot(ori.right)
-    z = (target - center).dot(ori.up)
-    return Vec3(x, y, z)
+    dx = target.x - center.x
+    dy = target.y - center.y
+    dz = target.z - center.z
+    forward = ori.forward
+    right = ori.right
+    up = ori.up
+    x = dx * forward.x + dy * forward.y + dz * forward.z
+    y = dx * right.x + dy * right.y + dz * right.z
+    z = dx * up.x + dy * up.y + dz * up.z
+    if out is None:
+        return Vec3(x, y, z)
+    return out.set(x, y, z)
@@ -0,0 +1,221 @@
+import numpy as np
+
+from util.cache import FRAMES_KEPT
+from util.util import ball_bounces, goal_threats, prediction_slices
+
+"""Ball Prediction Ingestion"""
+PREDICTION_SLICES = 360 #slices in the rlBot ball prediction
+SLICE_RATE = 60 #slices per second of game time
+PREDICTION_TOLERANCE = 1.0 #uu, how far overlapping slices may move before the prediction counts as changed
+CHECK_STRIDE = 8 #only every this many overlapping slices are compared, a touch changes every slice after it
+
+class PredictionBuffer():
+    """Keeps the ball prediction in a preallocated ring buffer, only adding the slices that are new each tick.
+
+    Each tick's prediction is usually the previous one moved on by a slice or two. When the overlapping slices
+    still match, the buffer drops the slices that are now in the past and appends only the new ones. Otherwise,
+    for example after a touch, the whole prediction is written again and version is increased, so analyses of the
+    prediction can be kept until the version changes.
+
+    Slices are numbered from the last rebuild, so a slice keeps its number while the window moves along. Slice
+    first of the numbering is index 0 of times and locations.
+
+    The ring holds FRAMES_KEPT + 1 predictions and the start of the ring is mirrored after its end, so every window
+    is a contiguous view. New slices are always written after the newest window, so the windows handed out for
+    the last FRAMES_KEPT frames stay intact while newer ones are ingested.
+
+    Attributes:
+        capacity (int): The most slices a prediction can have
+        version (int): Increased whenever the predicted trajectory changes
+        first (int): Number of the first slice in the window
+        appended (int): Slices added by the last ingest
+
+    """
+    def __init__(self, capacity=PREDICTION_SLICES):
+        """Creates an empty buffer"""
+        self.capacity = capacity
+        self.version = 0
+        self.first = 0
+        self.appended = 0
+        self._ring = (FRAMES_KEPT + 1) * capacity
+        self._times = np.zeros(self._ring + capacity)
+        self._locations = np.zeros((self._ring + capacity, 3))
+        self._start = 0
+        self._count = 0
+
+    @property
+    def times(self):
+        """Game time of each slice in the window, shape (n,)"""
+        return self._times[self._start:self._start + self._count]
+
+    @property
+    def locations(self):
+        """Predicted ball location of each slice in the window, shape (n, 3)"""
+        return self._locations[self._start:self._start + self._count]
+
+    def ingest(self, ball_prediction):
+        """Brings the buffer up to date with a new rlBot ball prediction.
+
+        Args:
+            ball_prediction (BallPrediction): the framework's prediction, or None if there is none
+
+        Returns:
+            tuple: The window's times with shape (n,) and locations with shape (n, 3). Both are views into the buffer.
+
+        """
+        slices = prediction_slices(ball_prediction)[:self.capacity]
+        new_times = slices[:, 12]
+        new_locations = slices[:, 0:3]
+
+        shift = self.matching_shift(new_times, new_locations)
+        if shift is None:
+            #write the whole prediction after the current window
+            self._start = (self._start + self._count) % self._ring
+            self._count = 0
+            self.first = 0
+            self.version += 1
+            self.write(new_times, new_locations)
+        else:
+            self._start = (self._start + shift) % self._ring
+            self._count -= shift
+            self.first += shift
+            if len(new_times) < self._count:
+                self._count = len(new_times)
+            self.write(new_times[self._count:], new_locations[self._count:])
+        return self.times, self.locations
+
+    def matching_shift(self, new_times, new_locations):
+        """Finds how many slices the new prediction has moved on from the window.
+
+        Returns:
+            int: The number of window slices now in the past, or None if the new prediction does not continue the
+            window unchanged
+
+        """
+        if self._count == 0 or len(new_times) == 0:
+            return None
+        times = self.times
+        shift = int(round((new_times[0] - times[0]) * SLICE_RATE))
+        if shift < 0 or shift >= self._count or abs(times[shift] - new_times[0]) > 0.5 / SLICE_RATE:
+            return None
+        overlap = min(self._count - shift, len(new_times))
+        old = self.locations[shift:shift + overlap:CHECK_STRIDE]
+        if np.abs(old - new_locations[:overlap:CHECK_STRIDE]).max() > PREDICTION_TOLERANCE:
+            return None
+        return shift
+
+    def write(self, times, locations):
+        """Appends slices after the window, wrapping around the end of the ring"""
+        self.appended = len(times)
+        position = (self._start + self._count) % self._ring
+        before_wrap = min(self.appended, self._ring - position)
+        self.store(position, times[:before_wrap], locations[:before_wrap])
+        self.store(0, times[before_wrap:], locations[before_wrap:])
+        self._count += self.appended
+
+    def store(self, position, times, locations):
+        """Copies slices into the ring at a position, and into the mirror if they are at the start of the ring"""
+        end = position + len(times)
+        self._times[position:end] = times
+        self._locations[position:end] = locations
+        if position < self.capacity:
+            mirrored = min(end, self.capacity) - position
+            self._times[position + self._ring:position + self._ring + mirrored] = times[:mirrored]
+            self._locations[position + self._ring:position + self._ring + mirrored] = locations[:mirrored]
+
+    def index(self, game_time):
+        """Gives the index of the window slice closest to a game time, clamped to the window"""
+        if self._count == 0:
+            return None
+        index = int(round((game_time - self._times[self._start]) * SLICE_RATE))
+        return min(max(index, 0), self._count - 1)
+
+class ThreatTracker():
+    """Keeps goal_threats up to date, only checking new slices while the prediction version is unchanged"""
+    def __init__(self):
+        """Creates a tracker that has seen no prediction"""
+        self.version = None
+        self.scanned = 0
+        self.blue = None
+        self.orange = None
+
+    def update(self, buffer):
+        """Gives the goal threats of the buffer's window, in the same form as goal_threats"""
+        end = buffer.first + len(buffer.locations)
+        if self.version != buffer.version or any(threat is not None and threat < buffer.first
+                                                 for threat in (self.blue, self.orange)):
+            self.version = buffer.version
+            self.scanned = buffer.first
+            self.blue = None
+            self.orange = None
+        elif self.scanned > end:
+            #the window got shorter, so forget what was found past its new end
+            self.scanned = end
+            if self.blue is not None and self.blue >= end:
+                self.blue = None
+            if self.orange is not None and self.orange >= end:
+                self.orange = None
+        start = max(self.scanned - buffer.first, 0)
+        blue, orange = goal_threats(buffer.locations[start:])
+        if self.blue is None and blue is not None:
+            self.blue = buffer.first + start + blue
+        if self.orange is None and orange is not None:
+            self.orange = buffer.first + start + orange
+        self.scanned = end
+        return (self.blue - buffer.first if self.blue is not None else None,
+                self.orange - buffer.first if self.orange is not None else None)
+
+class BounceTracker():
+    """Keeps ball_bounces up to date, only checking new slices while the prediction version is unchanged"""
+    def __init__(self):
+        """Creates a tracker that has seen no prediction"""
+        self.version = None
+        self.scanned = 0
+        self.bounces = np.zeros(0, dtype=int)
+
+    def update(self, buffer):
+        """Gives the bounces in the buffer's window, in the same form as ball_bounces"""
+        end = buffer.first + len(buffer.times)
+        if self.version != buffer.version:
+            self.version = buffer.version
+            self.scanned = buffer.first
+            self.bounces = np.zeros(0, dtype=int)
+        elif self.scanned > end:
+            #the window got shorter, and the last slice of a window can never be a bounce
+            self.scanned = end
+            self.bounces = self.bounces[self.bounces < end - 1]
+        if self.scanned == end:
+            #no new slices, so only the numbering of the window may have moved
+            return self.bounces[self.bounces > buffer.first] - buffer.first
+        #a bounce at a slice also depends on the slices either side of it
+        start = max(self.scanned - buffer.first - 2, 0)
+        found = ball_bounces(buffer.times[start:], buffer.locations[start:]) + buffer.first + start
+        found = found[found > max(self.scanned - 2, buffer.first)]
+        if len(self.bounces) > 0 and self.bounces[0] <= buffer.first:
+            self.bounces = self.bounces[self.bounces > buffer.first]
+        if len(found) > 0:
+            self.bounces = np.concatenate((self.bounces, found))
+        self.scanned = end
+        return self.bounces - buffer.first
+
+BALL_PREDICTION = PredictionBuffer()
+GOAL_THREATS = ThreatTracker()
+
+def ingest_prediction(ball_prediction):
+    """Ingests a new prediction into the process-wide buffer and updates the analyses the bot reads every tick.
+
+    Only analyses with a reader belong here, since every tick pays for them. A BounceTracker can be added the
+    same way once something needs the bounces.
+
+    Returns:
+        tuple: The prediction's (times, locations) and its goal_threats
+
+    """
+    prediction = BALL_PREDICTION.ingest(ball_prediction)
+    return prediction, GOAL_THREATS.update(BALL_PREDICTION)
+
+def reset_predictions():
+    """Forgets every ingested prediction and its analyses, as if no bot in the process had run yet"""
+    global BALL_PREDICTION, GOAL_THREATS
+    BALL_PREDICTION = PredictionBuffer()
+    GOAL_THREATS = ThreatTracker()
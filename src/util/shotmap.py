@@ -0,0 +1,139 @@
+import math
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from util.util import BALL_RADIUS, FIELD_LENGTH, FIELD_WIDTH, GOAL_HOME, GOAL_POST
+
+"""Shot Map Layout"""
+GRID_SPACING = 128 #uu between grid points
+SHOT_MAP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shotmap.npz')
+SHOT_MAP_VERSION = 1
+
+def generate_shot_map(spacing=GRID_SPACING):
+    """Computes the shot geometry toward the orange goal at every point of a grid covering the field.
+
+    The goal mouth is narrowed by a ball radius at each post. Points on or behind the goal line have no open
+    angle and aim at the center of the goal.
+
+    Returns:
+        dict: grid axes x and y, and open_angle, aim_x, heading_x and heading_y with shape (len(x), len(y))
+
+    """
+    x = np.arange(-FIELD_WIDTH / 2, FIELD_WIDTH / 2 + spacing, spacing)
+    y = np.arange(-FIELD_LENGTH / 2, FIELD_LENGTH / 2 + spacing, spacing)
+    xx, yy = np.meshgrid(x, y, indexing='ij')
+    post = GOAL_POST - BALL_RADIUS
+    to_line = GOAL_HOME.y - yy
+    in_front = to_line > 0
+
+    left = np.arctan2(to_line, -post - xx)
+    right = np.arctan2(to_line, post - xx)
+    open_angle = np.where(in_front, np.maximum(left - right, 0.0), 0.0)
+
+    #aim along the bisector of the open angle, or at the center of the goal from behind the line
+    bisector = np.where(in_front, (left + right) / 2, np.arctan2(to_line, -xx))
+    heading_x = np.cos(bisector)
+    heading_y = np.sin(bisector)
+    aim_x = np.where(in_front, xx + to_line * heading_x / np.maximum(heading_y, 1e-6), 0.0)
+    return {
+        'version': np.array(SHOT_MAP_VERSION),
+        'spacing': np.array(spacing),
+        'x': x,
+        'y': y,
+        'open_angle': open_angle,
+        'aim_x': np.clip(aim_x, -post, post),
+        'heading_x': heading_x,
+        'heading_y': heading_y,
+    }
+
+class ShotMap():
+    """Precomputed shot geometry over the whole field, sampled with bilinear interpolation.
+
+    The grid is stored for the orange goal. Lookups for the orange team mirror the ball's position and the
+    results, so one grid serves both teams. The grid is kept as nested lists because a single lookup in plain
+    Python is faster than the same handful of operations on small numpy arrays.
+
+    """
+    def __init__(self, grid):
+        """Creates a map from the arrays made by generate_shot_map"""
+        self.spacing = float(grid['spacing'])
+        self.x0 = float(grid['x'][0])
+        self.y0 = float(grid['y'][0])
+        self.columns = len(grid['x'])
+        self.rows = len(grid['y'])
+        fields = np.stack((grid['open_angle'], grid['aim_x'], grid['heading_x'], grid['heading_y']), axis=2)
+        self.fields = fields.tolist()
+
+    def interpolate(self, x, y):
+        """Interpolates the open angle, aim x and heading components toward the orange goal at a point"""
+        gx = min(max((x - self.x0) / self.spacing, 0.0), self.columns - 1.000001)
+        gy = min(max((y - self.y0) / self.spacing, 0.0), self.rows - 1.000001)
+        i = int(gx)
+        j = int(gy)
+        fx = gx - i
+        fy = gy - j
+        a = self.fields[i][j]
+        b = self.fields[i + 1][j]
+        c = self.fields[i][j + 1]
+        d = self.fields[i + 1][j + 1]
+        wa = (1 - fx) * (1 - fy)
+        wb = fx * (1 - fy)
+        wc = (1 - fx) * fy
+        wd = fx * fy
+        return (a[0] * wa + b[0] * wb + c[0] * wc + d[0] * wd,
+                a[1] * wa + b[1] * wb + c[1] * wc + d[1] * wd,
+                a[2] * wa + b[2] * wb + c[2] * wc + d[2] * wd,
+                a[3] * wa + b[3] * wb + c[3] * wc + d[3] * wd)
+
+    def sample(self, x, y, team):
+        """Interpolates the shot geometry at a ball position for a team, without creating any objects.
+
+        Args:
+            x (float): the ball's x coordinate
+            y (float): the ball's y coordinate
+            team (int): the team shooting, blue shoots at the orange goal
+
+        Returns:
+            tuple: the open angle, the x coordinate of the aim point on the goal line, and the x and y components
+            of the unit shot heading
+
+        """
+        open_angle, aim_x, heading_x, heading_y = self.interpolate(x, y) if team == 0 else self.interpolate(-x, -y)
+        #blending neighbouring headings shortens them, most of all where the heading swings around near the goal
+        length = max(math.hypot(heading_x, heading_y), 1e-6)
+        if team == 0:
+            return open_angle, aim_x, heading_x / length, heading_y / length
+        return open_angle, -aim_x, -heading_x / length, -heading_y / length
+
+def save_shot_map(path, grid):
+    """Replaces the saved shot map in one step, so bots starting at the same time never read half a file"""
+    handle, temporary = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb') as saved:
+            np.savez_compressed(saved, **grid)
+        os.replace(temporary, path)
+    except OSError:
+        os.remove(temporary)
+        raise
+
+def load_shot_map(path=SHOT_MAP_FILE):
+    """Loads the shot map, generating and saving it first if it is missing or out of date"""
+    try:
+        with np.load(path) as saved:
+            grid = {name: saved[name] for name in saved.files}
+        if int(grid['version']) == SHOT_MAP_VERSION and int(grid['spacing']) == GRID_SPACING:
+            return ShotMap(grid)
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass
+    grid = generate_shot_map()
+    try:
+        save_shot_map(path, grid)
+    except OSError:
+        #the map still works, it will just be generated again next time
+        pass
+    return ShotMap(grid)
+
+SHOT_MAP = load_shot_map()
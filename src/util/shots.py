@@ -0,0 +1,104 @@
+import numpy as np
+
+from util.vec import Vec3
+from util.util import BALL_RADIUS, GOAL_HEIGHT, GOAL_HOME, GOAL_POST, MAX_SPEED_CAR, sign
+
+"""Shot Target Sampling"""
+TARGET_COLUMNS = 9 #targets across the goal mouth
+TARGET_ROWS = 4 #targets from the ground to the crossbar
+
+"""Shot Scoring Weights"""
+ANGLE_COST = 1.0 #s of travel time that a half turn around the ball is worth
+BLOCK_COST = 2.0 #s of travel time that an opponent in the ball's path is worth
+BLOCK_RADIUS = 150 #uu, how close an opponent has to be to the ball's path to block it
+
+def goal_targets():
+    """Creates the grid of points in the orange goal mouth that the ball can be aimed at.
+
+    The points keep a ball radius away from the posts, ground and crossbar. Multiply y by -1 for the blue goal.
+
+    Returns:
+        ndarray: target locations with shape (TARGET_COLUMNS * TARGET_ROWS, 3)
+
+    """
+    x = np.linspace(-(GOAL_POST - BALL_RADIUS), GOAL_POST - BALL_RADIUS, TARGET_COLUMNS)
+    z = np.linspace(BALL_RADIUS, GOAL_HEIGHT - BALL_RADIUS, TARGET_ROWS)
+    xx, zz = np.meshgrid(x, z)
+    return np.stack((xx.ravel(), np.full(xx.size, GOAL_HOME.y), zz.ravel()), axis=1)
+
+TARGETS = goal_targets()
+
+class ShotChoice():
+    """The best place to aim a shot.
+
+    Attributes:
+        target (Vec3): The point in the goal mouth to hit the ball toward
+        contact (Vec3): The point on the ball the car needs to hit
+        approach_angle (float): Angle in radians between the car's approach and the shot direction
+        blocked (int): The number of opponents in the ball's path
+        cost (float): The score of the shot, lower is better
+
+    """
+    def __init__(self, target, contact, approach_angle, blocked, cost):
+        """Creates a new ShotChoice"""
+        self.target = target
+        self.contact = contact
+        self.approach_angle = approach_angle
+        self.blocked = blocked
+        self.cost = cost
+
+def score_shots(car_location, ball_location, opponent_locations, targets):
+    """Scores every target in a single vectorized pass.
+
+    Args:
+        car_location (ndarray): shape (3,)
+        ball_location (ndarray): shape (3,)
+        opponent_locations (ndarray): shape (m, 3), may be empty
+        targets (ndarray): shape (n, 3)
+
+    Returns:
+        tuple: contact points (n, 3), approach angles (n,), blocking opponent counts (n,) and costs (n,)
+
+    """
+    shot = targets - ball_location
+    shot_length = np.linalg.norm(shot, axis=1)
+    shot_direction = shot / shot_length[:, None]
+    contact = ball_location - shot_direction * BALL_RADIUS
+
+    approach = contact - car_location
+    approach_length = np.maximum(np.linalg.norm(approach, axis=1), 1.0)
+    cos_angle = np.einsum('ij,ij->i', approach, shot_direction) / approach_length
+    approach_angle = np.arccos(np.clip(cos_angle, -1.0, 1.0))
+
+    blocked = np.zeros(len(targets), dtype=int)
+    if len(opponent_locations) > 0:
+        #closest point on each shot path to each opponent, shape (n, m, 3)
+        relative = opponent_locations[None, :, :] - ball_location
+        along = np.einsum('nmk,nk->nm', relative, shot_direction)
+        along = np.clip(along, 0.0, shot_length[:, None])
+        closest = ball_location + along[:, :, None] * shot_direction[:, None, :]
+        gap = np.linalg.norm(opponent_locations[None, :, :] - closest, axis=2)
+        blocked = np.sum(gap < BLOCK_RADIUS, axis=1)
+
+    cost = approach_length / MAX_SPEED_CAR + ANGLE_COST * approach_angle / np.pi + BLOCK_COST * blocked
+    return contact, approach_angle, blocked, cost
+
+def best_shot(agent):
+    """Picks the best target in the opponent's goal for the bot's current position.
+
+    Args:
+        agent (BaseAgent): The bot. Uses me, ball, opponents and team.
+
+    Returns:
+        ShotChoice: the cheapest shot
+
+    """
+    targets = TARGETS * np.array([1.0, -sign(agent.team), 1.0])
+    car = np.array(agent.me.location.to_triple())
+    ball = np.array(agent.ball.location.to_triple())
+    opponents = np.array([opponent.location.to_triple() for opponent in agent.opponents]).reshape(-1, 3)
+
+    contact, approach_angle, blocked, cost = score_shots(car, ball, opponents, targets)
+    best = int(np.argmin(cost))
+    return ShotChoice(Vec3(*targets[best]), Vec3(*contact[best]), float(approach_angle[best]), int(blocked[best]),
+                      float(cost[best]))
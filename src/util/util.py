@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from util.vec import Vec3
 
 """Field Dimensions"""
@@ -23,12 +25,15 @@ BOOST_AMOUNT_SMALL = 12
 BOOST_HEIGHT_LARGE = 168 #uu
 BOOST_RADIUS_LARGE = 208 #uu
 BOOST_AMOUNT_LARGE = 100
+BOOST_RESPAWN_SMALL = 4 #s
+BOOST_RESPAWN_LARGE = 10 #s
 
 """Physics Measurements"""
 ACCELERATION_GRAVITY = 650 #uu/s^2
 ACCELERATION_BOOST = 991.66 #uu/s^2
 ACCELERATION_BRAKE = -3500 #uu/s^2
 ACCELERATION_COAST = -525 #uu/s^2
+ACCELERATION_THROTTLE = 1600 #uu/s^2 at zero speed, falls to 160 at FULL_SPEED_CAR
 
 """Car Measurements"""
 MAX_SPEED_CAR = 2300 #uu/s
@@ -41,35 +46,70 @@ JUMP_MAX_DURATION = 200 #ms
 JUMP_VELOCITY_ACCELERATION = 1400 #uu/s^2 during duration of jump
 BOOST_MAX_AMOUNT = 100
 BOOST_START_AMOUNT = 33.3
+CAR_REST_HEIGHT = 17 #uu height of the car's center when resting on the ground
 
 """Ball Measurements"""
 BALL_RADIUS_EXACT = 92.75 #uu
 BALL_RADIUS = 93 #uu
 BALL_RESTITUTION_COEFFIECIENT = 0.6
 
+"""Ball Prediction Layout"""
+SLICE_FLOATS = 13 #floats per slice in the rlBot ball prediction struct
+BOUNCE_ACCELERATION = 3000 #uu/s^2 of unexplained acceleration that counts as a bounce
+
 """Teams"""
 TEAM_ORANGE = 1
 TEAM_BLUE = 0
 
-def predict_ball_path(agent):
-    """Predicts the path of the ball using the rlBot framework
+def prediction_slices(ball_prediction):
+    """Views the rlBot ball prediction as an array without copying it
     
     Args:
-        agent (BaseAgent): The bot
+        ball_prediction (BallPrediction): the framework's prediction, or None if there is none
         
     Returns:
-        An array of Vec3 containing the predicted locations of the ball. Each location is seperated in time by
-        1/60 of a second, or one game tick.
+        ndarray: float32 slices with shape (n, SLICE_FLOATS). Each slice is location, rotation, velocity, angular
+        velocity, then game_seconds. The array is empty if no prediction is available.
     """
-    locations = []
+    if ball_prediction is None:
+        return np.zeros((0, SLICE_FLOATS), dtype=np.float32)
+    slices = np.frombuffer(ball_prediction.slices, dtype=np.float32).reshape(-1, SLICE_FLOATS)
+    return slices[:ball_prediction.num_slices]
+
+def goal_threats(locations):
+    """Finds when the predicted ball path first crosses each goal line
     
-    ball_prediction = agent.get_ball_prediction_struct()
-    if ball_prediction is not None:
-        for i in range(0, ball_prediction.num_slices):
-            prediction_slice = ball_prediction.slices[i]
-            locations.append(prediction_slice.physics.location)
+    Args:
+        locations (ndarray): predicted ball locations with shape (n, 3)
+        
+    Returns:
+        tuple: The index of the first slice past the blue goal line and the first slice past the orange goal line.
+        Each is None if the ball never crosses that line.
+    """
+    blue = np.nonzero(locations[:, 1] < -FIELD_LENGTH / 2)[0]
+    orange = np.nonzero(locations[:, 1] > FIELD_LENGTH / 2)[0]
+    return (int(blue[0]) if len(blue) > 0 else None, int(orange[0]) if len(orange) > 0 else None)
+
+def ball_bounces(times, locations):
+    """Finds the slices where the predicted ball bounces off the floor, walls, ceiling or a goal
+    
+    A bounce shows up as an acceleration that gravity alone can not explain.
     
-    return locations
+    Args:
+        times (ndarray): game time of each slice with shape (n,)
+        locations (ndarray): predicted ball locations with shape (n, 3)
+        
+    Returns:
+        ndarray: indices of the slices where a bounce happens
+    """
+    if len(times) < 3:
+        return np.zeros(0, dtype=int)
+    #slicing and comparing squared lengths keeps this cheap when it is run on just the newest few slices
+    dt = np.maximum(times[1:] - times[:-1], 1e-6)[:, None]
+    velocities = (locations[1:] - locations[:-1]) / dt
+    accelerations = (velocities[1:] - velocities[:-1]) / dt[1:]
+    accelerations[:, 2] += ACCELERATION_GRAVITY
+    return np.nonzero((accelerations * accelerations).sum(axis=1) > BOUNCE_ACCELERATION**2)[0] + 1
 
 def turn_radius(velocity):
     """Calculates the turn radius of a car given a speed
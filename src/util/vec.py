@@ -35,6 +35,13 @@ class Vec3:
             self.y = float(y)
             self.z = float(z)
 
+    def set(self, x: float, y: float, z: float) -> 'Vec3':
+        """Overwrites the components in place and returns this vector, so scratch vectors can be reused."""
+        self.x = x
+        self.y = y
+        self.z = z
+        return self
+
     def __getitem__(self, item: int):
         return (self.x, self.y, self.z)[item]
 
@@ -0,0 +1,131 @@
+import sys
+import threading
+
+import numpy as np
+
+from util.vec import Vec3
+from planner import AnytimePlanner
+
+SWITCH_INTERVAL = 0.0005 #s, how long a thread may hold the GIL before the tick loop gets a chance to run
+
+_switch_lock = threading.Lock()
+_switch_users = 0 #running workers that need the lowered switch interval
+_saved_switch_interval = None
+
+class Snapshot():
+    """A copy of the parts of the bot the planner reads, so planning can run while the bot moves on.
+
+    Snapshots have the same me, ball, opponents, team, game_time, ball_prediction and goal_threats attributes as
+    MyBot.
+
+    """
+    def __init__(self, agent):
+        """Copies the latest data from the bot"""
+        self.team = agent.team
+        self.game_time = agent.game_time
+        #the prediction arrays are views into a buffer that is reused as ticks go by, so they are copied
+        self.ball_prediction = tuple(np.array(values) for values in agent.ball_prediction)
+        self.goal_threats = agent.goal_threats
+        self.me = copy_object(agent.me)
+        self.ball = copy_object(agent.ball)
+        self.opponents = [copy_object(opponent) for opponent in agent.opponents]
+
+def copy_object(game_object):
+    """Copies a Car or Ball, duplicating its vectors"""
+    copy = type(game_object)()
+    copy.__dict__.update(game_object.__dict__)
+    for name, value in game_object.__dict__.items():
+        if isinstance(value, Vec3):
+            setattr(copy, name, Vec3(value))
+    return copy
+
+class Plan():
+    """A completed planning result.
+
+    Attributes:
+        state_class (type): The State to use
+        message (str): The message describing the state
+        game_time (float): The game time of the snapshot the plan was made from
+
+    """
+    def __init__(self, state_class, message, game_time):
+        """Creates a new Plan"""
+        self.state_class = state_class
+        self.message = message
+        self.game_time = game_time
+
+class PlanningWorker(threading.Thread):
+    """Runs the planner on a background thread so that get_output never waits for it.
+
+    The tick loop hands over the newest Snapshot with submit and reads the newest finished Plan with latest. Both
+    handoffs replace a single reference, which is atomic in Python, so neither side ever takes a lock. Snapshots
+    that arrive while the worker is busy simply replace each other, and the worker always plans from the freshest.
+
+    Attributes:
+        planner (AnytimePlanner): The planner run on each snapshot
+        staleness (float): Seconds of game time after which a plan is no longer used
+
+    """
+    def __init__(self, budget, staleness):
+        """Creates a stopped worker"""
+        super().__init__(name="PlanningWorker", daemon=True)
+        self.planner = AnytimePlanner(budget)
+        self.staleness = staleness
+        self._snapshot = None
+        self._plan = None
+        self._wake = threading.Event()
+        self._running = True
+        self._lowered = False
+
+    def start(self):
+        """Starts the worker thread.
+
+        The interpreter's switch interval is lowered so the planning thread can not hold up a tick for long. It
+        is shared by the whole process, so it is restored once the last running worker stops.
+        """
+        global _switch_users, _saved_switch_interval
+        with _switch_lock:
+            if _switch_users == 0:
+                _saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(_saved_switch_interval, SWITCH_INTERVAL))
+            _switch_users += 1
+        self._lowered = True
+        super().start()
+
+    def submit(self, snapshot):
+        """Hands a new snapshot to the worker without blocking"""
+        self._snapshot = snapshot
+        self._wake.set()
+
+    def latest(self, game_time):
+        """Gives the newest plan, or None if there is none or it is older than the staleness limit"""
+        plan = self._plan
+        if plan is None:
+            return None
+        age = game_time - plan.game_time
+        if age > self.staleness or age < 0:
+            return None
+        return plan
+
+    def stop(self):
+        """Asks the worker thread to finish and restores the switch interval if no other worker needs it"""
+        global _switch_users
+        self._running = False
+        self._wake.set()
+        with _switch_lock:
+            if self._lowered:
+                self._lowered = False
+                _switch_users -= 1
+                if _switch_users == 0:
+                    sys.setswitchinterval(_saved_switch_interval)
+
+    def run(self):
+        """Plans from each new snapshot until stopped"""
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            snapshot = self._snapshot
+            if snapshot is None or not self._running:
+                continue
+            state, message = self.planner.choose(snapshot)
+            self._plan = Plan(type(state), message, snapshot.game_time)
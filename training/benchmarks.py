@@ -0,0 +1,304 @@
+"""
+Headless benchmarks for the bot's hot paths, from vector math up to whole ticks of MyBot.get_output.
+
+Usage:
+    python benchmarks.py run [--save [FILE]] [--recorded TELEMETRY_FILE]
+    python benchmarks.py compare [FILE] [--threshold 0.25] [--recorded TELEMETRY_FILE]
+
+compare exits with status 1 if any benchmark's fastest sample is more than threshold slower than the stored
+baseline. The fastest sample is the one least disturbed by the rest of the machine, so it repeats best.
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent / 'src'))
+
+from bot import MyBot
+from planner import AnytimePlanner
+from states import groundController, shotController
+from telemetry import read_frames
+from util.cache import SHARED_CACHE
+from util.orientation import Orientation, relative_location
+from util.prediction import reset_predictions
+from util.util import turn_radius
+from util.vec import Vec3
+
+DEFAULT_BASELINE = Path(__file__).absolute().parent / 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 0.25
+TICK = 1 / 60
+SCENARIO_TICKS = 120
+SAMPLES = 25
+TARGET_SAMPLE_SECONDS = 0.02
+
+
+class NullRenderer:
+    """Stands in for the framework's renderer so get_output can run without a game"""
+    def begin_rendering(self, *args): pass
+    def end_rendering(self): pass
+    def draw_line_3d(self, *args): pass
+    def draw_string_3d(self, *args): pass
+    def draw_polyline_3d(self, *args): pass
+    def white(self): return None
+    def red(self): return None
+
+
+def set_vector(target, values):
+    """Copies an (x, y, z) tuple into a framework vector"""
+    target.x, target.y, target.z = values
+
+
+def make_packet(game_time, car_location, car_velocity, car_yaw, ball_location, ball_velocity,
+                opponent_location=(0, 4608, 17)):
+    """Builds a packet with our car, one opponent, the ball and every boost pad active"""
+    packet = GameTickPacket()
+    packet.num_cars = 2
+    packet.game_info.seconds_elapsed = game_time
+    packet.game_info.frame_num = int(round(game_time * 120))
+    packet.game_info.is_round_active = True
+    me = packet.game_cars[0]
+    set_vector(me.physics.location, car_location)
+    set_vector(me.physics.velocity, car_velocity)
+    me.physics.rotation.yaw = car_yaw
+    me.team = 0
+    me.boost = 50
+    me.has_wheel_contact = True
+    opponent = packet.game_cars[1]
+    set_vector(opponent.physics.location, opponent_location)
+    opponent.physics.rotation.yaw = -math.pi / 2
+    opponent.team = 1
+    opponent.has_wheel_contact = True
+    set_vector(packet.game_ball.physics.location, ball_location)
+    set_vector(packet.game_ball.physics.velocity, ball_velocity)
+    packet.num_boost = 34
+    for i in range(34):
+        packet.game_boosts[i].is_active = True
+    return packet
+
+
+def make_prediction(game_time, ball_location, ball_velocity):
+    """A simple ballistic prediction that rolls along the floor, good enough to exercise the analysis code"""
+    prediction = BallPrediction()
+    prediction.num_slices = 360
+    for i in range(360):
+        t = i * TICK
+        prediction_slice = prediction.slices[i]
+        prediction_slice.game_seconds = game_time + t
+        z = max(ball_location[2] + ball_velocity[2] * t - 325 * t * t, 93)
+        set_vector(prediction_slice.physics.location,
+                   (ball_location[0] + ball_velocity[0] * t, ball_location[1] + ball_velocity[1] * t, z))
+        set_vector(prediction_slice.physics.velocity, ball_velocity)
+    return prediction
+
+
+def synthetic_scenario(car_location, car_velocity, car_yaw, ball_location, ball_velocity):
+    """Builds SCENARIO_TICKS of packets and predictions with the car and ball moving in straight lines"""
+    ticks = []
+    for i in range(SCENARIO_TICKS):
+        t = 100 + i * TICK
+        car = tuple(car_location[k] + car_velocity[k] * i * TICK for k in range(3))
+        ball = tuple(ball_location[k] + ball_velocity[k] * i * TICK for k in range(3))
+        ticks.append((make_packet(t, car, car_velocity, car_yaw, ball, ball_velocity),
+                      make_prediction(t, ball, ball_velocity)))
+    return ticks
+
+
+def recorded_scenario(path):
+    """Builds packets and predictions from a telemetry file written by telemetry.py"""
+    ticks = []
+    for frame in read_frames(path):
+        car_yaw = frame['car_rotation'][1]
+        ticks.append((make_packet(frame['game_time'], frame['car_location'], frame['car_velocity'], car_yaw,
+                                  frame['ball_location'], frame['ball_velocity']),
+                      make_prediction(frame['game_time'], frame['ball_location'], frame['ball_velocity'])))
+    return ticks
+
+
+SCENARIOS = {
+    'attack': lambda: synthetic_scenario((0, -2000, 17), (0, 1000, 0), math.pi / 2, (500, 1500, 93), (0, 200, 0)),
+    'defend': lambda: synthetic_scenario((1500, -1000, 17), (0, -1200, 0), -math.pi / 2, (0, -3000, 300),
+                                         (0, -1500, 200)),
+    'chase': lambda: synthetic_scenario((-3000, 0, 17), (800, 0, 0), 0, (2500, 500, 93), (-300, 400, 0)),
+}
+
+
+def make_bot(scenario):
+    """Creates a bot in a freshly started process, without a game, and runs it for the scenario's first tick.
+
+    The planner keeps the budget the bot runs with, so these ticks cost what they cost in a match. The planner's
+    own work is measured separately by planner_choose, with a fixed workload.
+
+    """
+    SHARED_CACHE.clear()
+    reset_predictions()
+    bot = MyBot('FirstBot', 0, 0)
+    bot.renderer = NullRenderer()
+    packet, prediction = scenario[0]
+    bot.get_ball_prediction_struct = lambda: prediction
+    bot.initialize_agent()
+    bot.get_output(packet)
+    return bot
+
+
+def bench_get_output(scenario):
+    """Runs a fresh bot through every tick of a scenario, so one call is SCENARIO_TICKS ticks.
+
+    Returns:
+        tuple: the timed function, the ticks it runs and a setup function that creates its bot untimed
+
+    """
+    bots = []
+
+    def setup():
+        bots[:] = [make_bot(scenario)]
+
+    def run():
+        bot = bots[0]
+        for packet, prediction in scenario:
+            bot.get_ball_prediction_struct = lambda prediction=prediction: prediction
+            bot.get_output(packet)
+    return run, len(scenario), setup
+
+
+def bench_planner(bot):
+    """Scores every available state from scratch up to full fidelity, with no time limit.
+
+    The budget normally stops the planner early, so its measured time would not show a slower rollout. Without a
+    limit the number of rollouts is the same every call, so this measures what each of them costs.
+
+    """
+    planner = AnytimePlanner(math.inf)
+
+    def run():
+        planner.evaluations.clear()
+        planner.choose(bot)
+    return run, 1
+
+
+def micro_benchmarks():
+    """Gives the benchmarks of single operations, each as a (function, operations) tuple"""
+    scenario = SCENARIOS['attack']()
+    bot = make_bot(scenario)
+    a = Vec3(100, 200, 300)
+    b = Vec3(-50, 25, 12)
+    orientation = Orientation(0.1, 1.2, -0.3)
+    target = bot.ball.local_location
+    goal = Vec3(0, 5120, 0)
+    return {
+        'vec3_add': (lambda: a + b, 1),
+        'vec3_sub_length': (lambda: (a - b).length(), 1),
+        'vec3_normalized': (lambda: a.normalized(), 1),
+        'vec3_dot_cross': (lambda: a.cross(b).dot(a), 1),
+        'orientation_construct': (lambda: Orientation(0.1, 1.2, -0.3), 1),
+        'relative_location': (lambda: relative_location(a, orientation, b), 1),
+        'turn_radius': (lambda: turn_radius(1234.0), 1),
+        'ground_controller': (lambda: groundController(bot, target), 1),
+        'shot_controller': (lambda: shotController(bot, goal), 1),
+        'planner_choose': bench_planner(bot),
+    }
+
+
+def collect_benchmarks(recorded=None):
+    """Gives every benchmark by name, adding a replay of a telemetry file if one is given"""
+    benchmarks = micro_benchmarks()
+    for name, make_scenario in SCENARIOS.items():
+        benchmarks['get_output_' + name] = bench_get_output(make_scenario())
+    if recorded is not None:
+        benchmarks['get_output_recorded'] = bench_get_output(recorded_scenario(recorded))
+    return benchmarks
+
+
+def timed(function, loops, setup=None):
+    """Gives the seconds spent calling a function loops times, leaving out the calls to setup before each one"""
+    if setup is None:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        return time.perf_counter() - start
+    elapsed = 0.0
+    for _ in range(loops):
+        setup()
+        start = time.perf_counter()
+        function()
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def measure(function, operations, setup=None):
+    """Times a function and returns the median and minimum microseconds per operation"""
+    #find a loop count that makes one sample last roughly TARGET_SAMPLE_SECONDS
+    loops = 1
+    while timed(function, loops, setup) < TARGET_SAMPLE_SECONDS and loops < 1 << 20:
+        loops *= 2
+    samples = [timed(function, loops, setup) / (loops * operations) * 1e6 for _ in range(SAMPLES)]
+    return {'median_us': statistics.median(samples), 'min_us': min(samples)}
+
+
+def run_benchmarks(recorded=None):
+    """Measures every benchmark, printing each result, and returns them with a description of the machine"""
+    results = {}
+    for name, benchmark in collect_benchmarks(recorded).items():
+        results[name] = measure(*benchmark)
+        print(f"{name:28s} {results[name]['median_us']:12.2f} us  (min {results[name]['min_us']:.2f})")
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Prints how each benchmark changed and returns the names of those that regressed beyond threshold"""
+    regressions = []
+    for name, result in current['results'].items():
+        stored = baseline['results'].get(name)
+        if stored is None:
+            print(f"{name:28s} new")
+            continue
+        change = result['min_us'] / stored['min_us'] - 1
+        status = 'REGRESSION' if change > threshold else 'ok'
+        print(f"{name:28s} {stored['min_us']:12.2f} -> {result['min_us']:12.2f} us  {change:+7.1%}  {status}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Runs the benchmarks from the command line and returns the exit status"""
+    parser = argparse.ArgumentParser(description='Benchmarks for FirstBot')
+    parser.add_argument('mode', choices=['run', 'compare'])
+    parser.add_argument('baseline', nargs='?', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save', nargs='?', const=str(DEFAULT_BASELINE), metavar='FILE',
+                        help='store the results as a baseline, by default benchmark_baseline.json')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before compare fails, 0.25 means 25%%')
+    parser.add_argument('--recorded', help='telemetry file to replay as an extra get_output benchmark')
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.recorded)
+    if args.mode == 'run':
+        if args.save:
+            with open(args.save, 'w') as baseline_file:
+                json.dump(current, baseline_file, indent=2, sort_keys=True)
+            print(f"Saved baseline to {args.save}")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from rlbot.agents.base_agent import SimpleControllerState
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent / 'src'))
+
+from matchlog import MatchLog, MatchLogWriter
+
+TICKS = 250
+CHUNK_TICKS = 100
+DEFEND_FROM = 120 #ticks before this are logged as AimShot, the rest as Defend
+
+class LoggedTick():
+    """Stands in for the bot, holding the two attributes the writer reads from it"""
+    def __init__(self, tick):
+        self.game_time = 10 + tick / 60
+        self.frame_num = 1000 + tick
+
+def write_log(directory, ticks=TICKS, close=True):
+    """Writes a match where the ball moves one uu along x every tick and car 1's boost counts the ticks"""
+    writer = MatchLogWriter(directory, 0, 2, chunk_ticks=CHUNK_TICKS)
+    packet = GameTickPacket()
+    packet.num_cars = 2
+    controls = SimpleControllerState()
+    for tick in range(ticks):
+        packet.game_ball.physics.location.x = tick
+        packet.game_cars[1].boost = tick % 100
+        controls.throttle = 1.0 if tick % 2 == 0 else -1.0
+        controls.jump = tick % 3 == 0
+        writer.append(LoggedTick(tick), packet, 'AimShot' if tick < DEFEND_FROM else 'Defend', controls)
+    if close:
+        writer.close()
+    return writer
+
+class MatchLogTest(unittest.TestCase):
+    """
+    Writes a short match log and reads it back, checking that the columns, chunk boundaries, seeking by game time
+    and queries all agree with what was written.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / 'match')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        write_log(self.path)
+        log = MatchLog(self.path)
+        ticks = np.arange(TICKS)
+        self.assertEqual(log.ticks, TICKS)
+        self.assertEqual(len(log.chunks), 3)
+        np.testing.assert_allclose(log.times, 10 + ticks / 60)
+        np.testing.assert_array_equal(log.column('frame'), 1000 + ticks)
+        np.testing.assert_array_equal(log.column('ball_location')[:, 0], ticks)
+        np.testing.assert_array_equal(log.column('car1_boost'), ticks % 100)
+        np.testing.assert_array_equal(log.column('controls')[:, 0], np.where(ticks % 2 == 0, 1.0, -1.0))
+        np.testing.assert_array_equal(log.column('buttons') & 1, (ticks % 3 == 0).astype(int))
+        self.assertEqual(log.states, ['AimShot', 'Defend'])
+
+    def test_seek_across_chunks(self):
+        write_log(self.path)
+        log = MatchLog(self.path)
+        np.testing.assert_array_equal(log.read('ball_location', 95, 105)[:, 0], np.arange(95, 105))
+        found = log.seek(10 + 98.5 / 60, ['frame', 'ball_location'], ticks=4)
+        np.testing.assert_array_equal(found['frame'], 1000 + np.arange(99, 103))
+        np.testing.assert_array_equal(found['ball_location'][:, 0], np.arange(99, 103))
+        self.assertEqual(log.tick_at(0), 0)
+        self.assertEqual(log.tick_at(100), TICKS)
+
+    def test_query(self):
+        write_log(self.path)
+        log = MatchLog(self.path)
+        np.testing.assert_array_equal(log.query(state='Defend'), np.arange(DEFEND_FROM, TICKS))
+        np.testing.assert_array_equal(log.query(state='AimShot', ball_within=((50, 0, 0), 10.5)), np.arange(40, 61))
+        np.testing.assert_array_equal(log.query(ball_within=((110, 0, 0), 15)), np.arange(95, 126))
+        self.assertEqual(len(log.query(state='Kickoff')), 0)
+
+    def test_unclosed_log(self):
+        writer = write_log(self.path, close=False)
+        log = MatchLog(self.path)
+        self.assertEqual(log.ticks, 2 * CHUNK_TICKS)
+        np.testing.assert_array_equal(log.column('ball_location')[:, 0], np.arange(2 * CHUNK_TICKS))
+        writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent / 'src'))
+
+from util.prediction import PredictionBuffer, ThreatTracker, BounceTracker
+from util.util import ACCELERATION_GRAVITY, BALL_RADIUS, ball_bounces, goal_threats, prediction_slices
+
+TICKS = 3000
+SHORT_CHANCE = 0.05 #chance of a tick's prediction being cut short
+TOUCH_CHANCE = 0.01 #chance of a tick's prediction changing trajectory
+
+def ball_path(start, velocity, times):
+    """Gives a ball path that falls under gravity and bounces off the floor, with shape (len(times), 3)"""
+    locations = np.zeros((len(times), 3))
+    location = np.array(start, dtype=float)
+    velocity = np.array(velocity, dtype=float)
+    for i in range(len(times)):
+        locations[i] = location
+        dt = 1 / 60
+        velocity[2] -= ACCELERATION_GRAVITY * dt
+        location = location + velocity * dt
+        if location[2] < BALL_RADIUS:
+            location[2] = BALL_RADIUS
+            velocity[2] = -velocity[2] * 0.6
+    return locations
+
+def make_prediction(times, locations):
+    """Fills a BallPrediction with a path"""
+    prediction = BallPrediction()
+    prediction.num_slices = len(times)
+    for i in range(len(times)):
+        slice = prediction.slices[i]
+        slice.game_seconds = times[i]
+        slice.physics.location.x, slice.physics.location.y, slice.physics.location.z = locations[i]
+    return prediction
+
+class PredictionTrackerTest(unittest.TestCase):
+    """
+    Ingests a long run of ball predictions, some cut short and some changed by a touch, and checks that the
+    buffer and the incremental analyses always match analysing each full prediction from scratch.
+    """
+
+    def test_matches_full_recomputation(self):
+        rng = np.random.default_rng(0)
+        buffer = PredictionBuffer()
+        threats = ThreatTracker()
+        bounces = BounceTracker()
+        path = None
+        for tick in range(TICKS):
+            if path is None or rng.random() < TOUCH_CHANCE:
+                first_tick = tick
+                start = (rng.uniform(-3000, 3000), rng.uniform(-4000, 4000), rng.uniform(100, 1500))
+                velocity = (rng.uniform(-1000, 1000), rng.uniform(-3000, 3000), rng.uniform(-500, 1500))
+                path_times = 10 + (first_tick + np.arange(TICKS + 360)) / 60
+                path = ball_path(start, velocity, path_times)
+            offset = tick - first_tick
+            count = int(rng.integers(3, 360)) if rng.random() < SHORT_CHANCE else 360
+            prediction = make_prediction(path_times[offset:offset + count], path[offset:offset + count])
+
+            times, locations = buffer.ingest(prediction)
+            slices = prediction_slices(prediction)
+            expected_times = slices[:, 12].astype(float)
+            expected_locations = slices[:, 0:3].astype(float)
+            np.testing.assert_array_equal(times, expected_times)
+            np.testing.assert_array_equal(locations, expected_locations)
+            self.assertEqual(threats.update(buffer), goal_threats(expected_locations), f"tick {tick}")
+            np.testing.assert_array_equal(bounces.update(buffer), ball_bounces(expected_times, expected_locations),
+                                          f"tick {tick}")
+
+    def test_no_prediction(self):
+        buffer = PredictionBuffer()
+        times, locations = buffer.ingest(None)
+        self.assertEqual(times.shape, (0,))
+        self.assertEqual(locations.shape, (0, 3))
+        self.assertEqual(ThreatTracker().update(buffer), (None, None))
+        self.assertEqual(len(BounceTracker().update(buffer)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
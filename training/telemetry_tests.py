@@ -0,0 +1,102 @@
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from rlbot.agents.base_agent import SimpleControllerState
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent / 'src'))
+
+from bot import Ball, Car
+from telemetry import FRAME, FRAME_VERSION, TelemetryPublisher, pack_frame, read_frames, unpack_frame
+from util.orientation import Orientation
+from util.vec import Vec3
+
+def make_agent():
+    """Builds an object with the attributes pack_frame reads from the bot"""
+    class Agent():
+        pass
+    agent = Agent()
+    agent.index = 1
+    agent.team = 1
+    agent.frame_num = 4321
+    agent.game_time = 123.5
+    agent.me = Car()
+    agent.me.location = Vec3(100, -200, 17)
+    agent.me.velocity = Vec3(1000, 50, 0)
+    agent.me.rotation = Orientation(0.25, -1.5, 0.125)
+    agent.me.boost = 42
+    agent.ball = Ball()
+    agent.ball.location = Vec3(0, 1500, 93)
+    agent.ball.velocity = Vec3(-300, 400, 0)
+    return agent
+
+def make_controls():
+    """Builds commands with every button flag set except handbrake"""
+    controls = SimpleControllerState()
+    controls.throttle = 1.0
+    controls.steer = -0.5
+    controls.pitch = 0.25
+    controls.jump = True
+    controls.boost = True
+    return controls
+
+class TelemetryFrameTest(unittest.TestCase):
+    """
+    Packs telemetry frames and reads them back, directly, through a file written like the receiver writes one, and
+    over a local socket, checking that every field survives.
+    """
+
+    def check_frame(self, frame):
+        self.assertEqual(frame['version'], FRAME_VERSION)
+        self.assertEqual((frame['index'], frame['team'], frame['frame_num']), (1, 1, 4321))
+        self.assertEqual(frame['game_time'], 123.5)
+        self.assertEqual(frame['state'], 'AimShot')
+        self.assertEqual(frame['timings'], (0.5, 1.0, 0.25, 1.75))
+        self.assertEqual(frame['target'], (10.0, 20.0, 30.0))
+        self.assertEqual(frame['controls'], (1.0, -0.5, 0.25, 0.0, 0.0))
+        self.assertEqual((frame['jump'], frame['boost_pressed'], frame['handbrake']), (True, True, False))
+        self.assertEqual(frame['ball_location'], (0.0, 1500.0, 93.0))
+        self.assertEqual(frame['car_location'], (100.0, -200.0, 17.0))
+        self.assertEqual(frame['car_rotation'], (0.25, -1.5, 0.125))
+        self.assertEqual(frame['car_boost'], 42.0)
+
+    def pack(self):
+        return pack_frame(make_agent(), 'AimShot', (0.5, 1.0, 0.25, 1.75), Vec3(10, 20, 30), make_controls())
+
+    def test_round_trip(self):
+        data = self.pack()
+        self.assertEqual(len(data), FRAME.size)
+        self.check_frame(unpack_frame(data))
+
+    def test_read_frames(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'telemetry.bin')
+            with open(path, 'wb') as log:
+                log.write(self.pack() * 3)
+                #a frame cut short by the receiver stopping is ignored
+                log.write(self.pack()[:10])
+            frames = read_frames(path)
+        self.assertEqual(len(frames), 3)
+        for frame in frames:
+            self.check_frame(frame)
+
+    def test_publish(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(2)
+        publisher = TelemetryPublisher(receiver.getsockname()[1])
+        publisher.start()
+        try:
+            publisher.publish(self.pack())
+            self.check_frame(unpack_frame(receiver.recv(FRAME.size * 2)))
+        finally:
+            publisher.stop()
+            publisher.join(2)
+            receiver.close()
+        self.assertEqual(publisher.dropped, 0)
+
+if __name__ == '__main__':
+    unittest.main()